@@ -0,0 +1,61 @@
+"""Compares the preprocessing of images for the OCR before and after using a gamma lookup table.
+
+Run from the repository root: python -m benchmarks.ocr_pre_proc
+"""
+
+import logging
+import timeit
+
+import cv2
+import numpy as np
+
+import src.logger
+from src.config import BASE_DIR
+from src.config.data import COLORS
+from src.utils.image_operations import color_filter
+from src.utils.ocr.read import _pre_proc_img
+
+LOGGER = logging.getLogger(__name__)
+
+IMAGES = {
+    "1080p_descr": "tests/assets/item/season6/1080p_small_read_descr_1.png",
+    "1440p_descr": "tests/assets/item/season6/1440p_small_read_descr_1.png",
+    "header": "tests/assets/ocr/header_champions_demise.png",
+}
+RUNS = 200
+
+
+def _pre_proc_img_reference(input_img: np.ndarray) -> np.ndarray:
+    """Preprocessing as it was before, with a copy of the image, a float gamma correction and a rectangle per red contour"""
+    img = input_img.copy()
+    masked_red, _ = color_filter(img, COLORS.unusable_red, False)
+    contours, _ = cv2.findContours(masked_red, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        cv2.rectangle(img, (x, y), (x + w, y + h), (0, 0, 0), -1)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    gamma_corrected = (np.power(gray / 255.0, 1.8) * 255.0).astype(np.uint8)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
+    dilated = cv2.dilate(gamma_corrected, kernel, iterations=1)
+    return cv2.erode(dilated, kernel, iterations=1)
+
+
+def _bench(func) -> float:
+    return min(timeit.repeat(func, number=RUNS, repeat=3)) / RUNS
+
+
+def run():
+    for key, image_path in IMAGES.items():
+        img = cv2.imread(str(BASE_DIR / image_path))
+        identical = np.array_equal(_pre_proc_img_reference(img), _pre_proc_img(img))
+        time_reference = _bench(lambda img=img: _pre_proc_img_reference(img))
+        time_lut = _bench(lambda img=img: _pre_proc_img(img))
+        LOGGER.info(
+            f"{key} ({img.shape[1]}x{img.shape[0]}): {time_reference * 1000:.3f}ms -> {time_lut * 1000:.3f}ms "
+            f"({time_reference / time_lut:.1f}x), output {'identical' if identical else 'DIFFERENT'}"
+        )
+
+
+if __name__ == "__main__":
+    src.logger.setup(log_level="INFO")
+    run()
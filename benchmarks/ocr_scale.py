@@ -0,0 +1,65 @@
+"""Compares latency and accuracy of reading item descriptions per resolution for different target line heights of the OCR.
+
+Run from the repository root: python -m benchmarks.ocr_scale
+"""
+
+import logging
+import time
+from collections import defaultdict
+
+import cv2
+
+import src.logger
+from src.cam import Cam
+from src.config.loader import IniConfigLoader
+from src.item.descr.read_descr import read_descr
+from src.utils.ocr.read import OCR_CACHE
+from tests.item import read_descr_season5_test, read_descr_season6_test, read_descr_unknown_test
+
+LOGGER = logging.getLogger(__name__)
+
+# 0 reads in full resolution
+LINE_HEIGHTS = [0, 40, 33, 25]
+RUNS = 3
+
+
+def _cases() -> dict[tuple[int, int], list]:
+    cases = defaultdict(list)
+    for img_res, image_path, expected_item in [
+        *read_descr_season5_test.items,
+        *read_descr_season6_test.items,
+        *read_descr_season6_test.sigils,
+        *read_descr_unknown_test.legendary,
+    ]:
+        cases[img_res].append((cv2.imread(str(image_path)), expected_item))
+    return cases
+
+
+def run():
+    cases = _cases()
+    for line_height in LINE_HEIGHTS:
+        IniConfigLoader().advanced_options.ocr_line_height = line_height
+        for img_res, items in sorted(cases.items()):
+            Cam().update_window_pos(0, 0, *img_res)
+            durations = []
+            correct = 0
+            for img, expected_item in items:
+                for _ in range(RUNS):
+                    OCR_CACHE.clear()
+                    start = time.perf_counter()
+                    try:
+                        item = read_descr(expected_item.rarity, img, show_warnings=False)
+                    except Exception:
+                        # text that is read too badly can break the parsing
+                        item = None
+                    durations.append(time.perf_counter() - start)
+                    correct += item == expected_item
+            LOGGER.info(
+                f"line height {line_height or 'full'}, {img_res[0]}x{img_res[1]} ({len(items)} items): "
+                f"{min(durations) * 1000:.0f}ms min {sum(durations) / len(durations) * 1000:.0f}ms mean, {correct}/{len(items) * RUNS} correct"
+            )
+
+
+if __name__ == "__main__":
+    src.logger.setup(log_level="INFO")
+    run()
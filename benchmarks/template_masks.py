@@ -0,0 +1,86 @@
+"""Compares matching of templates with transparency before and after cropping them to their opaque area.
+
+Run from the repository root: python -m benchmarks.template_masks
+"""
+
+import logging
+import timeit
+
+import cv2
+import numpy as np
+
+import src.logger
+from src.config import BASE_DIR
+from src.config.data import load_templates
+from src.config.ui import ResManager, _ResTransformer
+from src.utils.image_operations import alpha_to_mask, crop
+from src.utils.roi_operations import to_grid
+
+LOGGER = logging.getLogger(__name__)
+
+IMAGES = {
+    "1080p_inventory": ("tests/assets/ui/char_inventory_fav_junk_1080p.png", "1920x1080", "junk_inv", (3, 11)),
+    "1080p_inventory_2": ("tests/assets/ui/char_inventory_fav_junk_1080p_2.png", "1920x1080", "junk_inv", (3, 11)),
+    "1440p_chest": ("tests/assets/ui/chest_open_1440p_wide.png", "3440x1440", "junk_stash", (5, 10)),
+}
+RUNS = 200
+
+
+def _full_template(name: str, resolution: str) -> tuple[np.ndarray, np.ndarray]:
+    """Grayscale template and mask of the whole asset as they were used before cropping"""
+    path = next((BASE_DIR / "assets/templates").rglob(f"{name}.png"))
+    template_img = cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
+    transformer = _ResTransformer(resolution)
+    return (
+        transformer._resize_image(cv2.cvtColor(template_img, cv2.COLOR_BGRA2GRAY)),
+        transformer._resize_image(alpha_to_mask(template_img)),
+    )
+
+
+def _bench(func) -> float:
+    return min(timeit.repeat(func, number=RUNS, repeat=3)) / RUNS
+
+
+def run():
+    for key, (image_path, resolution, name, (rows, columns)) in IMAGES.items():
+        ResManager().set_resolution(resolution)
+        img = cv2.cvtColor(cv2.imread(str(BASE_DIR / image_path)), cv2.COLOR_BGR2GRAY)
+        full_img, full_mask = _full_template(name, resolution)
+        template = _ResTransformer(resolution)._transform_templates(load_templates())[name]
+        width, height = template.size
+        x, y = template.offset
+        slots = [crop(img, roi) for roi in to_grid(getattr(ResManager().roi, f"slots_{rows}x{columns}"), rows, columns)]
+
+        def _match_full(slots=slots, full_img=full_img, full_mask=full_mask):
+            return [cv2.matchTemplate(slot, full_img, cv2.TM_CCOEFF_NORMED, mask=full_mask) for slot in slots]
+
+        def _match_cropped(slots=slots, template=template, width=width, height=height, x=x, y=y):
+            return [
+                cv2.matchTemplate(
+                    slot[
+                        y : y + slot.shape[0] - height + template.img_gray.shape[0],
+                        x : x + slot.shape[1] - width + template.img_gray.shape[1],
+                    ],
+                    template.img_gray,
+                    cv2.TM_CCOEFF_NORMED,
+                    mask=template.alpha_mask,
+                )
+                for slot in slots
+            ]
+
+        score_diff = [
+            abs(np.nan_to_num(full).max() - np.nan_to_num(cropped).max())
+            for full, cropped in zip(_match_full(), _match_cropped(), strict=True)
+        ]
+        time_full, time_cropped = _bench(_match_full), _bench(_match_cropped)
+        LOGGER.info(
+            f"{key} ({name}, {len(slots)} slots): template {full_img.shape[1]}x{full_img.shape[0]} -> "
+            f"{template.img_gray.shape[1]}x{template.img_gray.shape[0]}, mask {'kept' if template.alpha_mask is not None else 'dropped'}, "
+            f"{time_full * 1000:.2f}ms -> {time_cropped * 1000:.2f}ms ({time_full / time_cropped:.1f}x), "
+            f"max score diff {max(score_diff):.4f}"
+        )
+
+
+if __name__ == "__main__":
+    src.logger.setup(log_level="INFO")
+    run()
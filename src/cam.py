@@ -2,22 +2,27 @@ import logging
 import threading
 import time
 
-import mss
-import mss.windows
 import numpy as np
 
+from src.capture import BackgroundCapture, CaptureBackend, MssBackend, next_frame_id
 from src.config.ui import ResManager
 from src.utils.misc import convert_args_to_numpy
 
 LOGGER = logging.getLogger(__name__)
 
-mss.windows.CAPTUREBLT = 0
 cached_img_lock = threading.Lock()
 
+# Seconds to wait for a frame of the background capture before grabbing directly, e.g. if the capture thread stalls
+BACKGROUND_CAPTURE_TIMEOUT = 1.0
+
 
 class Cam:
+    backend: CaptureBackend = None
+    background_capture: BackgroundCapture = None
     last_grab: int = None
     cached_img: np.ndarray = None
+    frame_id: int = 0
+    _roi_grabs: dict[tuple[int, ...], tuple[np.ndarray, float, int]] = {}
     window_offset_set: bool = False
     window_roi: dict = {"top": 0, "left": 0, "width": 0, "height": 0}
     monitor_x_range: tuple[int] = None
@@ -32,6 +37,53 @@ class Cam:
             cls._instance = super().__new__(cls)
         return cls._instance
 
+    def set_backend(self, backend: CaptureBackend):
+        """Replaces the source of grabbed frames, e.g. with recorded frames. Their resolution is used as window if it is known."""
+        background_fps = None
+        if self.background_capture is not None:
+            background_fps = self.background_capture.fps
+            self.stop_capture()
+        with cached_img_lock:
+            if self.backend is not None:
+                self.backend.close()
+            self.backend = backend
+            self.cached_img = None
+            self.last_grab = None
+            self._roi_grabs.clear()
+        if backend.resolution is not None:
+            self.update_window_pos(0, 0, *backend.resolution)
+        if background_fps is not None:
+            self.start_capture(background_fps)
+
+    def start_capture(self, fps: float, buffer_size: int = 3):
+        """
+        Captures the window in the background. Grabs return a copy of the latest captured frame instead of capturing themselves.
+        :param fps: Captures per second
+        :param buffer_size: Number of frames in the ring buffer
+        """
+        self.stop_capture()
+        if self.backend is None:
+            self.backend = MssBackend()
+        LOGGER.debug(f"Start background capture with {fps} fps")
+        self.background_capture = BackgroundCapture(self.backend, self.window_roi, fps, buffer_size)
+        self.background_capture.start()
+
+    def stop_capture(self):
+        if self.background_capture is not None:
+            self.background_capture.stop()
+            self.background_capture = None
+
+    def wait_for_frame(self, frame_id: int, timeout: float | None = None) -> tuple[np.ndarray, int] | None:
+        """
+        Waits for a frame that is newer than frame_id, e.g. to process every frame once
+        :return: Image and frame id like grab_frame() or None on timeout
+        """
+        if self.background_capture is None:
+            img, new_frame_id = self.grab_frame(force_new=True)
+            return img, new_frame_id
+        frame = self.background_capture.wait_for_newer(frame_id, timeout)
+        return None if frame is None else (frame.img, frame.frame_id)
+
     def update_window_pos(self, offset_x: int, offset_y: int, width: int, height: int):
         if (
             self.is_offset_set()
@@ -59,23 +111,68 @@ class Cam:
     def is_offset_set(self):
         return self.window_offset_set
 
-    def grab(self, force_new: bool = False) -> np.ndarray:
-        if not force_new and self.cached_img is not None and self.last_grab is not None and time.perf_counter() - self.last_grab < 0.04:
-            return self.cached_img
-
+    def clip_to_window(self, roi: list[int] | np.ndarray) -> np.ndarray:
+        """Clips a region [left, top, width, height] in window coordinates to the window"""
+        x0, y0 = max(int(roi[0]), 0), max(int(roi[1]), 0)
+        x1 = min(int(roi[0] + roi[2]), self.window_roi["width"])
+        y1 = min(int(roi[1] + roi[3]), self.window_roi["height"])
+        return np.array([x0, y0, max(x1 - x0, 0), max(y1 - y0, 0)])
+
+    def grab(self, force_new: bool = False, roi: list[int] | np.ndarray | None = None) -> np.ndarray:
+        """
+        :param force_new: Take a new screenshot even if the last one is recent. With background capture, wait for the next frame
+        :param roi: Only grab this region, [left, top, width, height] in window coordinates. It is clipped to the window, see
+            clip_to_window() for the position of the returned image
+        :return: BGR image of the window or of the roi
+        """
+        return self.grab_frame(force_new, roi)[0]
+
+    def grab_frame(self, force_new: bool = False, roi: list[int] | np.ndarray | None = None) -> tuple[np.ndarray, int]:
+        """
+        Grabs the window like grab()
+        :return: Image and its frame id. The id changes with every new screenshot, so it identifies cached images.
+        """
         # wait for offsets to be found
         if not self.is_offset_set():
             LOGGER.debug("Wait for window detection")
             while not self.window_offset_set:
                 time.sleep(0.05)
             LOGGER.debug("Found window, continue grabbing")
+        if roi is not None:
+            roi = self.clip_to_window(roi)
+            x, y, w, h = roi
+        if (background_capture := self.background_capture) is not None:
+            frame = background_capture.latest(roi)
+            if force_new or frame is None:
+                frame_id = -1 if frame is None else frame.frame_id
+                frame = background_capture.wait_for_newer(frame_id, BACKGROUND_CAPTURE_TIMEOUT, roi)
+            if frame is not None:
+                return frame.img, frame.frame_id
+            LOGGER.warning(f"No frame of the background capture within {BACKGROUND_CAPTURE_TIMEOUT}s, grab directly")
         with cached_img_lock:
-            self.last_grab = time.perf_counter()
-        with mss.mss() as sct:
-            img = np.array(sct.grab(self.window_roi))
+            if not force_new and self._is_recent(self.last_grab) and self.cached_img is not None:
+                return (self.cached_img if roi is None else self.cached_img[y : y + h, x : x + w]), self.frame_id
+            if not force_new and roi is not None and (cached := self._roi_grabs.get(tuple(roi))) is not None and self._is_recent(cached[1]):
+                return cached[0], cached[2]
+            grab_time = time.perf_counter()
+            if roi is None:
+                self.last_grab = grab_time
+        if self.backend is None:
+            self.backend = MssBackend()
+        is_empty = roi is not None and (w == 0 or h == 0)
+        img = np.zeros((h, w, 3), dtype=np.uint8) if is_empty else self.backend.grab(self.window_roi, roi)
         with cached_img_lock:
-            self.cached_img = img[:, :, :3]
-        return self.cached_img
+            self.frame_id = next_frame_id()
+            if roi is None:
+                self.cached_img = img
+                self._roi_grabs.clear()
+            else:
+                self._roi_grabs[tuple(roi)] = (img, grab_time, self.frame_id)
+            return img, self.frame_id
+
+    @staticmethod
+    def _is_recent(grab_time: float | None) -> bool:
+        return grab_time is not None and time.perf_counter() - grab_time < 0.04
 
     # Conversions
     # ============================================================================
@@ -0,0 +1,236 @@
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import mss
+import mss.windows
+import numpy as np
+from natsort import natsorted
+
+LOGGER = logging.getLogger(__name__)
+
+mss.windows.CAPTUREBLT = 0
+
+_frame_ids = itertools.count(1)
+_frame_ids_lock = threading.Lock()
+
+
+def next_frame_id() -> int:
+    """Ids of captured frames, unique across all capture paths so that results can be cached per frame"""
+    with _frame_ids_lock:
+        return next(_frame_ids)
+
+
+@dataclass
+class Frame:
+    img: np.ndarray
+    frame_id: int
+    timestamp: float
+
+
+class CaptureBackend:
+    """Source of the frames that Cam grabs"""
+
+    @property
+    def resolution(self) -> tuple[int, int] | None:
+        """Width and height of the frames if they are known without a window, e.g. for recorded frames"""
+        return None
+
+    def grab(self, window_roi: dict, roi: np.ndarray | None = None) -> np.ndarray:
+        """
+        :param window_roi: Window position in the format of mss, {"top": int, "left": int, "width": int, "height": int}
+        :param roi: Only grab this region, [left, top, width, height] in window coordinates and within the window
+        :return: BGR image of the window or of the roi
+        """
+        raise NotImplementedError
+
+    def grab_into(self, window_roi: dict, out: np.ndarray | None) -> np.ndarray:
+        """
+        Grabs the window into out instead of a new array, e.g. into a slot of a ring buffer
+        :param window_roi: Window position, see grab()
+        :param out: Array the frame is written to. A new one is allocated if it is None or does not have the shape of the frame
+        :return: out or the newly allocated array
+        """
+        img = self.grab(window_roi)
+        if out is None or out.shape != img.shape:
+            out = np.empty(img.shape, dtype=img.dtype)
+        np.copyto(out, img)
+        return out
+
+    def close(self):
+        pass
+
+
+class MssBackend(CaptureBackend):
+    """Grabs the screen with mss. The mss handles are kept open, one per thread as they can not be shared between threads."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._handles: list[mss.base.MSSBase] = []
+        self._lock = threading.Lock()
+
+    def grab(self, window_roi: dict, roi: np.ndarray | None = None) -> np.ndarray:
+        if (sct := getattr(self._local, "sct", None)) is None:
+            sct = self._local.sct = mss.mss()
+            with self._lock:
+                self._handles.append(sct)
+        if roi is not None:
+            window_roi = {
+                "top": window_roi["top"] + int(roi[1]),
+                "left": window_roi["left"] + int(roi[0]),
+                "width": int(roi[2]),
+                "height": int(roi[3]),
+            }
+        # a view of the buffer mss allocated for the screenshot, so the pixels are not copied before they are needed
+        return np.asarray(sct.grab(window_roi))[:, :, :3]
+
+    def close(self):
+        with self._lock:
+            for sct in self._handles:
+                try:
+                    sct.close()
+                except Exception:
+                    LOGGER.debug("Could not close mss handle", exc_info=True)
+            self._handles.clear()
+        self._local = threading.local()
+
+
+class ReplayBackend(CaptureBackend):
+    """
+    Serves frames from a directory of PNGs in natural sort order instead of the game window, e.g. to run and benchmark the
+    vision pipeline without the game. Every grab returns the next frame.
+    :param path: Directory with the frames
+    :param loop: Start over after the last frame, otherwise the last frame is returned from then on
+    """
+
+    def __init__(self, path: Path, loop: bool = False):
+        self._files = natsorted(Path(path).glob("*.png"), key=lambda file: file.name)
+        if not self._files:
+            raise FileNotFoundError(f"No frames found in {path}")
+        self._loop = loop
+        self._next_idx = 0
+        self._lock = threading.Lock()
+        self._resolution = tuple(self._read(0).shape[1::-1])
+
+    @property
+    def resolution(self) -> tuple[int, int]:
+        return self._resolution
+
+    @property
+    def remaining(self) -> int:
+        """Number of frames that were not grabbed yet"""
+        return len(self._files) - self._next_idx
+
+    def _read(self, idx: int) -> np.ndarray:
+        if (img := cv2.imread(str(self._files[idx]))) is None:
+            raise FileNotFoundError(f"Could not load frame: {self._files[idx]}")
+        return img
+
+    def grab(self, window_roi: dict, roi: np.ndarray | None = None) -> np.ndarray:
+        with self._lock:
+            idx = min(self._next_idx, len(self._files) - 1)
+            self._next_idx += 1
+            if self._loop and self._next_idx >= len(self._files):
+                self._next_idx = 0
+        img = self._read(idx)
+        if roi is not None:
+            x, y, w, h = roi
+            img = img[y : y + h, x : x + w]
+        return img
+
+
+class BackgroundCapture:
+    """
+    Captures frames on its own thread into a ring buffer of arrays that are reused as long as the window size does not change.
+    Readers copy the latest frame out of the buffer, so they never wait for a capture and the capture never waits for a reader.
+    :param backend: Source of the frames
+    :param window_roi: Window position, see CaptureBackend.grab(). It is read for every capture, so window changes are picked up
+    :param fps: Captures per second
+    :param size: Number of frames in the ring buffer. At least 2, the latest frame is never written to
+    """
+
+    def __init__(self, backend: CaptureBackend, window_roi: dict, fps: float, size: int = 3):
+        if size < 2:
+            raise ValueError("The ring buffer needs at least 2 frames")
+        self.backend = backend
+        self.fps = fps
+        self._window_roi = window_roi
+        self._buffers: list[np.ndarray | None] = [None] * size
+        # -1 marks a buffer that is being written
+        self._frame_ids = [-1] * size
+        self._timestamps = [0.0] * size
+        self._latest = -1
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="BackgroundCapture", daemon=True)
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread.is_alive()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        interval = 1 / self.fps
+        next_capture = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                self._capture()
+            except Exception:
+                LOGGER.exception("Background capture failed")
+            next_capture = max(next_capture + interval, time.perf_counter())
+            self._stop.wait(next_capture - time.perf_counter())
+
+    def _capture(self):
+        idx = (self._latest + 1) % len(self._buffers)
+        with self._cond:
+            self._frame_ids[idx] = -1
+        self._buffers[idx] = self.backend.grab_into(self._window_roi, self._buffers[idx])
+        with self._cond:
+            self._frame_ids[idx] = next_frame_id()
+            self._timestamps[idx] = time.perf_counter()
+            self._latest = idx
+            self._cond.notify_all()
+
+    def latest(self, roi: np.ndarray | None = None) -> Frame | None:
+        """
+        :param roi: Only copy this region, [left, top, width, height] within the frame
+        :return: Copy of the latest frame or None if nothing was captured yet
+        """
+        while True:
+            with self._cond:
+                if self._latest < 0:
+                    return None
+                idx = self._latest
+                frame_id, timestamp = self._frame_ids[idx], self._timestamps[idx]
+            img = self._buffers[idx]
+            if roi is not None:
+                x, y, w, h = roi
+                img = img[y : y + h, x : x + w]
+            img = img.copy()
+            with self._cond:
+                # the buffer was overwritten while copying it if the capture lapped the ring buffer, copy a newer frame then
+                if self._frame_ids[idx] == frame_id:
+                    return Frame(img, frame_id, timestamp)
+
+    def wait_for_newer(self, frame_id: int, timeout: float | None = None, roi: np.ndarray | None = None) -> Frame | None:
+        """
+        :param frame_id: Id of the last frame the caller knows
+        :param timeout: Seconds to wait at most, None to wait until there is a newer frame
+        :param roi: Only copy this region, see latest()
+        :return: Copy of a frame newer than frame_id or None on timeout
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._latest >= 0 and self._frame_ids[self._latest] > frame_id, timeout):
+                return None
+        return self.latest(roi)
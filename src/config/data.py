@@ -1,7 +1,8 @@
 """Everything is this file is based on UHD resolution (3840x2160)."""
 
 import logging
-from dataclasses import dataclass
+import threading
+from collections.abc import Callable
 from functools import lru_cache
 from pathlib import Path
 
@@ -63,30 +64,119 @@ POSITIONS = (
 )
 
 
-@dataclass
+TEMPLATE_VARIANTS = ("img_bgra", "img_bgr", "img_gray", "alpha_mask", "offset", "size")
+# Masks of cropped templates with at most this fraction of transparent pixels are dropped, unmasked matching is much faster
+SOLID_MASK_RATIO = 0.01
+
+
 class Template:
-    name: str = None
-    img_bgra: np.ndarray = None
-    img_bgr: np.ndarray = None
-    img_gray: np.ndarray = None
-    alpha_mask: np.ndarray = None
+    """
+    Template image whose variants are only created when they are accessed for the first time
+    :param name: Name of the template asset
+    :param create_variant: Creates a variant by its name, only called for variants that are not passed in
+    :param variants: Variants that are already available, e.g. img_bgr
+    """
+
+    def __init__(self, name: str = None, create_variant: Callable[[str], np.ndarray | None] = None, **variants: np.ndarray | None):
+        self.name = name
+        self._create_variant = create_variant
+        self._variants = variants
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"Template(name={self.name!r}, variants={sorted(self._variants)})"
+
+    def build(self, variant: str) -> np.ndarray | None:
+        """Returns a variant without keeping it in memory if it was not created before"""
+        if variant in self._variants or self._create_variant is None:
+            return self._variants.get(variant)
+        return self._create_variant(variant)
+
+    def get(self, variant: str) -> np.ndarray | None:
+        if variant not in self._variants:
+            with self._lock:
+                if variant not in self._variants:
+                    self._variants[variant] = self.build(variant)
+        return self._variants[variant]
+
+    @property
+    def img_bgra(self) -> np.ndarray | None:
+        return self.get("img_bgra")
+
+    @property
+    def img_bgr(self) -> np.ndarray | None:
+        return self.get("img_bgr")
+
+    @property
+    def img_gray(self) -> np.ndarray | None:
+        return self.get("img_gray")
+
+    @property
+    def alpha_mask(self) -> np.ndarray | None:
+        return self.get("alpha_mask")
+
+    @property
+    def offset(self) -> tuple[int, int]:
+        """Position of the images within the template asset, they are cropped to its opaque area"""
+        if (offset := self.get("offset")) is None:
+            return 0, 0
+        return int(offset[0]), int(offset[1])
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """Width and height of the template asset, matches cover this area"""
+        if (size := self.get("size")) is None:
+            return self.img_bgr.shape[1], self.img_bgr.shape[0]
+        return int(size[0]), int(size[1])
+
+
+class _TemplateAsset:
+    """Template asset on disk. It is decoded and cropped to its opaque area once, on the first access to any of its variants."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._decoded: tuple[np.ndarray, np.ndarray | None, np.ndarray, np.ndarray] | None = None
+        self._lock = threading.Lock()
+
+    def _decode(self) -> tuple[np.ndarray, np.ndarray | None, np.ndarray, np.ndarray]:
+        with self._lock:
+            if self._decoded is None:
+                template_img = cv2.imread(str(self.path), cv2.IMREAD_UNCHANGED)
+                if template_img is None:
+                    raise FileNotFoundError(f"Could not load image: {self.path}")
+                size = np.array([template_img.shape[1], template_img.shape[0]])
+                x, y = 0, 0
+                if (alpha_mask := alpha_to_mask(template_img)) is not None:
+                    x, y, w, h = cv2.boundingRect(alpha_mask)
+                    template_img = template_img[y : y + h, x : x + w]
+                    alpha_mask = alpha_to_mask(template_img)
+                    if alpha_mask is not None and np.count_nonzero(alpha_mask == 0) <= SOLID_MASK_RATIO * alpha_mask.size:
+                        alpha_mask = None
+                self._decoded = template_img, alpha_mask, np.array([x, y]), size
+            return self._decoded
+
+    def create_variant(self, variant: str) -> np.ndarray | None:
+        template_img, alpha_mask, offset, size = self._decode()
+        match variant:
+            case "img_bgra":
+                return template_img
+            case "img_bgr":
+                return cv2.cvtColor(template_img, cv2.COLOR_BGRA2BGR)
+            case "img_gray":
+                return cv2.cvtColor(template_img, cv2.COLOR_BGRA2GRAY)
+            case "alpha_mask":
+                return alpha_mask
+            case "offset":
+                return offset
+            case "size":
+                return size
+        raise ValueError(f"Unknown template variant: {variant}")
 
 
 @lru_cache
 def load_templates() -> dict[str, Template]:
-    result = {}
-    template_paths = Path(BASE_DIR / "assets/templates").rglob("*.png")
-    for template in template_paths:
-        try:
-            template_img = cv2.imread(str(template), cv2.IMREAD_UNCHANGED)
-        except cv2.error:
-            LOGGER.exception(f"Could not load image: {template}")
-            continue
-        result[template.stem.lower()] = Template(
-            name=template.stem.lower(),
-            img_bgra=template_img,
-            img_bgr=cv2.cvtColor(template_img, cv2.COLOR_BGRA2BGR),
-            img_gray=cv2.cvtColor(template_img, cv2.COLOR_BGRA2GRAY),
-            alpha_mask=alpha_to_mask(template_img),
-        )
-    return result
+    """Templates are only listed here, images are read from disk once a variant is accessed"""
+    return {
+        template.stem.lower(): Template(name=template.stem.lower(), create_variant=_TemplateAsset(template).create_variant)
+        for template in Path(BASE_DIR / "assets/templates").rglob("*.png")
+    }
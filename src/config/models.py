@@ -161,6 +161,10 @@ class AspectUniqueFilterModel(AffixAspectFilterModel):
 
 
 class AdvancedOptionsModel(_IniBaseModel):
+    capture_fps: int = Field(
+        default=0,
+        description="Capture the game window in the background with this many frames per second. 0 captures only when needed",
+    )
     exit_key: str = Field(default="f12", description="Hotkey to exit d4lf", json_schema_extra={IS_HOTKEY_KEY: "True"})
     force_refresh_only: str = Field(
         default="ctrl+shift+f11",
@@ -174,6 +178,11 @@ class AdvancedOptionsModel(_IniBaseModel):
     move_to_inv: str = Field(
         default="f7", description="Hotkey to move configured items from stash to inventory", json_schema_extra={IS_HOTKEY_KEY: "True"}
     )
+    ocr_line_height: int = Field(
+        default=40,
+        description="Text of higher resolutions is shrunk to this line height in pixels before it is read. 0 reads it in full resolution",
+    )
+    ocr_pool_size: int = Field(default=4, description="Number of Tesseract instances that read items in parallel")
     process_name: str = Field(
         default="Diablo IV.exe",
         description="The process that is running Diablo 4. Could help usage when playing through a streaming service like GeForce Now",
@@ -213,6 +222,24 @@ class AdvancedOptionsModel(_IniBaseModel):
     def key_must_exist(cls, k: str) -> str:
         return validate_hotkey(k)
 
+    @field_validator("capture_fps")
+    def capture_fps_in_range(cls, v: int) -> int:
+        if not 0 <= v <= 120:
+            raise ValueError("Capture fps must be between 0 and 120, inclusive")
+        return v
+
+    @field_validator("ocr_line_height")
+    def ocr_line_height_in_range(cls, v: int) -> int:
+        if not 0 <= v <= 100:
+            raise ValueError("OCR line height must be between 0 and 100, inclusive")
+        return v
+
+    @field_validator("ocr_pool_size")
+    def ocr_pool_size_in_range(cls, v: int) -> int:
+        if not 1 <= v <= 32:
+            raise ValueError("OCR pool size must be between 1 and 32, inclusive")
+        return v
+
     @field_validator("scripts", mode="before")
     def check_scripts_is_list(cls, v: str) -> list[str]:
         if isinstance(v, str):
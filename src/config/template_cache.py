@@ -0,0 +1,117 @@
+"""Persistent cache of templates that are already scaled to a resolution. All arrays of a resolution are stored in one file that
+is memory mapped on load, templates are views into it."""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from functools import lru_cache, partial
+from pathlib import Path
+
+import numpy as np
+
+from src.config import BASE_DIR
+from src.config.data import TEMPLATE_VARIANTS, Template
+from src.config.loader import IniConfigLoader
+
+LOGGER = logging.getLogger("d4lf")
+
+DATA_FILE = "templates.bin"
+INDEX_FILE = "templates.json"
+# Bump whenever the preparation of templates changes, e.g. cropping, masks or scaling, so outdated cache entries are not used
+CACHE_VERSION = 1
+
+
+@lru_cache
+def templates_hash() -> str:
+    """
+    Hash over the cache version and names, sizes and modification times of all template assets. Changes to any template or to
+    their preparation invalidate the cache.
+    """
+    sha = hashlib.sha1(f"v{CACHE_VERSION}".encode())
+    for template in sorted(Path(BASE_DIR / "assets/templates").rglob("*.png")):
+        stat = template.stat()
+        sha.update(f"{template.relative_to(BASE_DIR).as_posix()}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return sha.hexdigest()[:16]
+
+
+def _cache_root() -> Path:
+    return IniConfigLoader().user_dir / "cache" / "templates"
+
+
+def _cache_dir(resolution: str) -> Path:
+    return _cache_root() / f"{resolution}_{templates_hash()}"
+
+
+def load_cached_templates(resolution: str) -> dict[str, Template] | None:
+    """
+    Loads templates for a resolution from the cache
+    :param resolution: Resolution in the format "{width}x{height}"
+    :return: Templates whose variants are read-only views of the mapped file or None if there is no valid cache entry
+    """
+    cache_dir = _cache_dir(resolution)
+    if not (cache_dir / INDEX_FILE).exists():
+        return None
+    try:
+        with open(cache_dir / INDEX_FILE, encoding="utf-8") as f:
+            index: dict[str, dict[str, tuple[int, list[int], str]]] = json.load(f)
+        data = np.memmap(cache_dir / DATA_FILE, dtype=np.uint8, mode="r")
+        if data.size < max(offset + _nbytes(shape, dtype) for variants in index.values() for offset, shape, dtype in variants.values()):
+            raise ValueError(f"Unexpected size of {DATA_FILE}")
+        return {name: Template(name=name, create_variant=partial(_view_variant, data, variants)) for name, variants in index.items()}
+    except (OSError, ValueError):
+        LOGGER.warning(f"Template cache {cache_dir} is corrupt, it will be recreated")
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        return None
+
+
+def _nbytes(shape: list[int], dtype: str) -> int:
+    return int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+
+def _view_variant(data: np.memmap, variants: dict[str, tuple[int, list[int], str]], variant: str) -> np.ndarray | None:
+    if variant not in variants:
+        return None
+    offset, shape, dtype = variants[variant]
+    return data[offset : offset + _nbytes(shape, dtype)].view(dtype).reshape(shape)
+
+
+def save_cached_templates(resolution: str, templates: dict[str, Template]):
+    """
+    Stores templates for a resolution in the cache and removes entries of outdated template assets
+    :param resolution: Resolution in the format "{width}x{height}"
+    :param templates: Templates scaled to the resolution
+    """
+    cache_dir = _cache_dir(resolution)
+    tmp_dir = cache_dir.with_name(f"{cache_dir.name}.tmp{os.getpid()}_{threading.get_ident()}")
+    try:
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        index = {}
+        offset = 0
+        with open(tmp_dir / DATA_FILE, "wb") as f:
+            for name, template in templates.items():
+                index[name] = {}
+                for variant in TEMPLATE_VARIANTS:
+                    if (value := template.build(variant)) is None:
+                        continue
+                    value = np.ascontiguousarray(value)
+                    # keep views of wider types aligned
+                    padding = -offset % value.itemsize
+                    f.write(bytes(padding) + value.tobytes())
+                    index[name][variant] = (offset + padding, value.shape, value.dtype.str)
+                    offset += padding + value.nbytes
+        # the index marks the entry as complete, so write it last
+        with open(tmp_dir / INDEX_FILE, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        os.replace(tmp_dir, cache_dir)
+    except OSError:
+        LOGGER.warning(f"Could not write template cache {cache_dir}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+
+    for entry in _cache_root().iterdir():
+        if templates_hash() not in entry.name:
+            shutil.rmtree(entry, ignore_errors=True)
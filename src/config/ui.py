@@ -1,11 +1,14 @@
 import logging
+from functools import partial
 
 import cv2
 import numpy as np
 
+from src import TP
 from src.config.data import POSITIONS, Template, load_templates
 from src.config.helper import singleton
 from src.config.models import UiOffsetsModel, UiPosModel, UiRoiModel
+from src.config.template_cache import load_cached_templates, save_cached_templates
 
 LOGGER = logging.getLogger("d4lf")
 
@@ -53,15 +56,23 @@ class _ResTransformer:
             if key.endswith("_special"):  # do not transform templates that end with _special
                 result[key] = value
             else:
-                result[key] = Template(
-                    name=value.name,
-                    img_bgra=self._resize_image(src=value.img_bgra),
-                    img_bgr=self._resize_image(src=value.img_bgr),
-                    img_gray=self._resize_image(src=value.img_gray),
-                    alpha_mask=self._resize_image(src=value.alpha_mask) if value.alpha_mask is not None else None,
-                )
+                result[key] = Template(name=value.name, create_variant=partial(self._transform_template_variant, value))
         return result
 
+    def _transform_template_variant(self, template: Template, variant: str) -> np.ndarray | None:
+        if (src := template.build(variant)) is None:
+            return None
+        if variant in ("offset", "size"):
+            return (src * self._scale_y).astype(int)
+        return self._resize_image(src=src)
+
+    def get_templates(self) -> dict[str, Template]:
+        resolution = f"{self._target_width}x{self._target_height}"
+        if (templates := load_cached_templates(resolution)) is None:
+            templates = self._transform_templates(load_templates())
+            TP.submit(save_cached_templates, resolution, templates)
+        return templates
+
     def _transform_tuples(self, value: tuple[int, int]) -> tuple[int, int]:
         values = self._transform_array(value=np.array(value, dtype=int))
         return int(values[0]), int(values[1])
@@ -91,8 +102,7 @@ class _ResTransformer:
             tab_slots_6=self._transform_array(value=POSITIONS[3].tab_slots_6),
             vendor_text=self._transform_array(value=POSITIONS[3].vendor_text),
         )
-        templates = self._transform_templates(load_templates())
-        return offsets, pos, roi, templates
+        return offsets, pos, roi, self.get_templates()
 
 
 @singleton
@@ -5,6 +5,7 @@ import threading
 from src.config import AFFIX_COMPARISON_CHARS, BASE_DIR
 from src.config.loader import IniConfigLoader
 from src.item.data.item_type import ItemType
+from src.item.descr.matcher import FuzzyMatcher
 
 LOGGER = logging.getLogger(__name__)
 
@@ -13,8 +14,13 @@ DATALOADER_LOCK = threading.Lock()
 
 class Dataloader:
     affix_dict = {}
+    affix_key_matcher: FuzzyMatcher = None
+    affix_matcher: FuzzyMatcher = None
     affix_sigil_dict = {}
+    affix_sigil_key_matcher: FuzzyMatcher = None
+    affix_sigil_matcher: FuzzyMatcher = None
     aspect_unique_dict = {}
+    aspect_unique_matcher: FuzzyMatcher = None
     aspect_unique_num_idx = {}
     error_map = {}
     filter_after_keyword = []
@@ -69,3 +75,11 @@ class Dataloader:
             for key, d in data.items():
                 self.aspect_unique_dict[key] = d["desc"][:AFFIX_COMPARISON_CHARS]
                 self.aspect_unique_num_idx[key] = d["num_idx"]
+
+        self.affix_matcher = FuzzyMatcher(self.affix_dict)
+        # TTS reads the names of affixes, they are matched against the keys without a cutoff
+        self.affix_key_matcher = FuzzyMatcher({key: key for key in self.affix_dict}, score_cutoff=None)
+        self.affix_sigil_matcher = FuzzyMatcher(self.affix_sigil_dict)
+        # sigils only show the key of their affixes if advanced tooltips are turned off
+        self.affix_sigil_key_matcher = FuzzyMatcher({key: key for key in self.affix_sigil_dict})
+        self.aspect_unique_matcher = FuzzyMatcher(self.aspect_unique_dict)
@@ -22,7 +22,7 @@ from src.gui.importer.common import (
 from src.item.data.affix import Affix
 from src.item.data.item_type import ItemType
 from src.item.data.rarity import ItemRarity
-from src.item.descr.text import clean_str, closest_match
+from src.item.descr.text import clean_str
 
 LOGGER = logging.getLogger(__name__)
 
@@ -130,7 +130,7 @@ def _construct_api_url(listing_url: str, cursor: int = 1) -> str:
 def _create_affixes_from_api_dict(affixes: list[dict[str, Any]]) -> list[Affix]:
     res = []
     for affix in affixes:
-        new_affix = Affix(name=closest_match(clean_str(affix["name"]), Dataloader().affix_dict), value=affix["value"])
+        new_affix = Affix(name=Dataloader().affix_matcher.match(clean_str(affix["name"]))[0], value=affix["value"])
         if isinstance(new_affix.value, list):
             if new_affix.value:
                 new_affix.value = new_affix.value[0]
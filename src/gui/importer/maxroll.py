@@ -10,7 +10,7 @@ from src.dataloader import Dataloader
 from src.gui.importer.common import get_with_retry, match_to_enum, retry_importer, save_as_profile
 from src.item.data.affix import Affix
 from src.item.data.item_type import ItemType
-from src.item.descr.text import clean_str, closest_match
+from src.item.descr.text import clean_str
 
 LOGGER = logging.getLogger(__name__)
 
@@ -162,7 +162,7 @@ def _find_item_affixes(mapping_data: dict, item_affixes: dict) -> list[Affix]:
                             attr_desc = "to basic skills"
             clean_desc = re.sub(r"\[.*?\]|[^a-zA-Z ]", "", attr_desc)
             clean_desc = clean_desc.replace("SecondSeconds", "seconds")
-            affix_obj = Affix(name=closest_match(clean_str(clean_desc), Dataloader().affix_dict))
+            affix_obj = Affix(name=Dataloader().affix_matcher.match(clean_str(clean_desc))[0])
             if affix_obj.name is not None:
                 res.append(affix_obj)
             elif "formula" in affix["attributes"][0] and affix["attributes"][0]["formula"] in ["InherentAffixAnyResist_Ring"]:
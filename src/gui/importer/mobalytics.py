@@ -18,7 +18,7 @@ from src.gui.importer.common import (
 )
 from src.item.data.affix import Affix
 from src.item.data.item_type import ItemType
-from src.item.descr.text import clean_str, closest_match
+from src.item.descr.text import clean_str
 
 LOGGER = logging.getLogger(__name__)
 
@@ -104,7 +104,7 @@ def import_mobalytics(url: str):
                     substring in affix_name.lower() for substring in ["focus", "offhand", "shield", "totem"]
                 ):  # special line indicating the item type
                     continue
-            affix_obj = Affix(name=closest_match(clean_str(_corrections(input_str=affix_name)), Dataloader().affix_dict))
+            affix_obj = Affix(name=Dataloader().affix_matcher.match(clean_str(_corrections(input_str=affix_name)))[0])
             if affix_obj.name is None:
                 LOGGER.error(f"Couldn't match {affix_name=}")
                 continue
@@ -1,42 +1,19 @@
 import logging
 
 import numpy as np
+from tesserocr import PSM
 
 from src.config.ui import ResManager
 from src.dataloader import Dataloader
 from src.item.data.affix import Affix, AffixType
-from src.item.descr.text import clean_str, closest_match, find_number, remove_text_after_first_keyword
+from src.item.descr.reread import ReadAttempt, read_regions
+from src.item.descr.text import clean_str, find_number, remove_text_after_first_keyword
 from src.template_finder import TemplateMatch
-from src.utils.image_operations import crop
-from src.utils.ocr.read import image_to_text
+from src.utils.ocr.read import OcrSession
 
 LOGGER = logging.getLogger(__name__)
 
 
-def split_into_paragraphs(
-    affix_bullets: list[TemplateMatch], affix_lines: list[str], line_pos: list[any], offset_y_affix_bullets: int, threshold: int
-) -> list[str]:
-    paragraphs = []
-    current_paragraph = ""
-
-    for text, pos in zip(affix_lines, line_pos, strict=False):
-        # Check if any bullet point is close to the line
-        is_bullet_close = any(abs(pos[1]["y"] - (bullet.center[1] - offset_y_affix_bullets)) < threshold for bullet in affix_bullets)
-        if is_bullet_close:
-            if current_paragraph:
-                paragraphs.append(current_paragraph)
-            current_paragraph = text
-        else:
-            current_paragraph += f" {text}"
-
-    # Filter special errors were affix seems to wrongly detect sth like "% :" on a seperate line
-    # TODO: Is this nice? Not sure
-    if current_paragraph and len(current_paragraph) > 3:
-        paragraphs.append(current_paragraph.strip())
-
-    return paragraphs
-
-
 def filter_affix_lines(affix_lines: list[str], line_pos: list[any]) -> tuple[list[str], list[any]]:
     filtered_affix_lines = []
     filtered_line_pos = []
@@ -59,6 +36,54 @@ def filter_affix_lines(affix_lines: list[str], line_pos: list[any]) -> tuple[lis
     return filtered_affix_lines, filtered_line_pos
 
 
+def affix_strip_rois(
+    img_item_descr: np.ndarray, affix_bullets: list[TemplateMatch], left: int, bottom_limit: int
+) -> list[tuple[int, int, int, int]]:
+    """:return: One strip of the image per bullet point, reaching from the bullet point to the next one"""
+    line_height = ResManager().offsets.item_descr_line_height
+    tops = [bullet.center[1] - int(line_height * 0.6) for bullet in affix_bullets]
+    bottoms = [*tops[1:], bottom_limit]
+    return [(left, top, img_item_descr.shape[1] - left, bottom - top) for top, bottom in zip(tops, bottoms, strict=True)]
+
+
+def _read_paragraph(ocr_session: OcrSession, roi: tuple[int, int, int, int], do_pre_proc: bool) -> ReadAttempt:
+    res, line_pos = ocr_session.read(roi, line_boxes=True, do_pre_proc=do_pre_proc, psm=PSM.SINGLE_BLOCK)
+    lines = [line for line in res.text.lower().split("\n") if line]
+    if len(lines) == len(line_pos):
+        # like for the whole block, drop text that is right of a line, e.g. the value range of an affix
+        lines, _ = filter_affix_lines(lines, line_pos)
+    return ReadAttempt(text=_correct_errors(" ".join(lines)), do_pre_proc=do_pre_proc, ocr_result=res)
+
+
+def _correct_errors(paragraph: str) -> str:
+    for error, correction in Dataloader().error_map.items():
+        paragraph = paragraph.replace(error, correction)
+    return paragraph
+
+
+def _match_affixes(attempts: list[ReadAttempt], is_sigil: bool, is_inherent: bool):
+    """Matches the texts of all attempts at once and sets their keys and distances"""
+    cleaned = {}
+    for i, attempt in enumerate(attempts):
+        cleaned_str = clean_str(attempt.text)
+        if len(cleaned_str) < 4:
+            continue
+        if is_sigil and is_inherent:
+            # A bit of a hack to match the locations...
+            cleaned_str = remove_text_after_first_keyword(cleaned_str, [" in "])
+        cleaned[i] = cleaned_str
+
+    matcher = Dataloader().affix_sigil_matcher if is_sigil else Dataloader().affix_matcher
+    for i, (found_key, distance) in zip(cleaned, matcher.match_many(list(cleaned.values())), strict=True):
+        attempts[i].key, attempts[i].distance = found_key, distance
+    if is_sigil:
+        # In case advanced tooltips are turned off sigils now only show the key value
+        unmatched = [i for i in cleaned if attempts[i].key is None]
+        key_matches = Dataloader().affix_sigil_key_matcher.match_many([cleaned[i] for i in unmatched])
+        for i, (found_key, distance) in zip(unmatched, key_matches, strict=True):
+            attempts[i].key, attempts[i].distance = found_key, distance
+
+
 def find_affixes(
     img_item_descr: np.ndarray,
     affix_bullets: list[TemplateMatch],
@@ -66,67 +91,39 @@ def find_affixes(
     is_sigil: bool = False,
     is_inherent: bool = False,
     do_pre_proc_flag: bool = True,
-) -> tuple[list[Affix] | None, str]:
+    ocr_session: OcrSession | None = None,
+) -> tuple[list[Affix], str]:
     affixes: list[Affix] = []
     if len(affix_bullets) == 0:
         return affixes, ""
 
     # Affix starts at first bullet point
-    img_width = img_item_descr.shape[1]
     line_height = ResManager().offsets.item_descr_line_height
     affix_top_left = [affix_bullets[0].center[0] + int(line_height * 0.3), affix_bullets[0].center[1] - int(line_height * 0.6)]
 
-    # Calc full region of all affixes
-    affix_width = img_width - affix_top_left[0]
-    affix_height = bottom_limit - affix_top_left[1]
-    full_affix_region = [*affix_top_left, affix_width, affix_height]
-    crop_full_affix = crop(img_item_descr, full_affix_region)
     do_pre_proc = not (is_sigil or not do_pre_proc_flag)
-    res, line_pos = image_to_text(crop_full_affix, line_boxes=True, do_pre_proc=do_pre_proc)
-    affix_lines = res.text.lower().split("\n")
-    affix_lines = [line for line in affix_lines if line]  # remove empty lines
-    if len(affix_lines) != len(line_pos):
-        return None, "affix_lines and line_pos not same length"
-    # filter lines that have the same y-coordinate by choosing the smallest x-coordinate. Remove from affix_lines and line_pos
-    affix_lines, line_pos = filter_affix_lines(affix_lines, line_pos)
-    paragraphs = split_into_paragraphs(
-        affix_bullets=affix_bullets,
-        affix_lines=affix_lines,
-        line_pos=line_pos,
-        offset_y_affix_bullets=full_affix_region[1],
-        threshold=int(line_height // 2),
-    )
-
+    ocr_session = ocr_session or OcrSession(img_item_descr)
+    strips = affix_strip_rois(img_item_descr, affix_bullets, affix_top_left[0], bottom_limit)
     if is_sigil and is_inherent:
         # A bit of a hack to remove the "revives allowed" and monster level affix as it is not part of the generated affix list...
-        paragraphs = paragraphs[:1]
-
-    for combined_lines in paragraphs:
-        for error, correction in Dataloader().error_map.items():
-            combined_lines = combined_lines.replace(error, correction)
-        cleaned_str = clean_str(combined_lines)
-        if len(cleaned_str) < 4:
-            continue
+        strips = strips[:1]
+
+    # strips that could not be matched are read once more with the other preprocessing variant
+    attempts = read_regions(
+        strips,
+        lambda strip, strip_do_pre_proc: _read_paragraph(ocr_session, strip, strip_do_pre_proc),
+        lambda strip_attempts: _match_affixes(strip_attempts, is_sigil, is_inherent),
+        do_pre_proc,
+    )
 
-        if is_sigil:
-            # A bit of a hack to match the locations...
-            if is_inherent:
-                cleaned_str = remove_text_after_first_keyword(cleaned_str, [" in "])
-            found_key = closest_match(cleaned_str, Dataloader().affix_sigil_dict)
-            if not found_key:
-                # In case advanced tooltips are turned off sigils now only show the key value
-                adapted_search_dict = {k: k for k, _ in Dataloader().affix_sigil_dict.items()}
-                found_key = closest_match(cleaned_str, adapted_search_dict)
-        else:
-            found_key = closest_match(cleaned_str, Dataloader().affix_dict)
-        if found_key is not None:
+    for attempt in attempts:
+        if attempt.key is not None:
             if is_sigil:
-                affixes.append(Affix(name=found_key, value=None, text=combined_lines))
+                affixes.append(Affix(name=attempt.key, value=None, text=attempt.text))
             else:
-                affixes.append(Affix(name=found_key, value=find_number(combined_lines), text=combined_lines))
-        else:
-            if not is_sigil:
-                LOGGER.warning(f"Affix does not exist: {cleaned_str=} ||| {combined_lines=}")
+                affixes.append(Affix(name=attempt.key, value=find_number(attempt.text), text=attempt.text))
+        elif not is_sigil and len(cleaned_str := clean_str(attempt.text)) >= 4:
+            LOGGER.warning(f"Affix does not exist: {cleaned_str=} ||| combined_lines={attempt.text!r}")
 
     # Add location to the found_values
     affix_x = affix_bullets[0].center[0]
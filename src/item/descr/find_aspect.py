@@ -5,26 +5,29 @@ import numpy as np
 from src.config import AFFIX_COMPARISON_CHARS
 from src.dataloader import Dataloader
 from src.item.data.aspect import Aspect
-from src.item.descr.text import clean_str, closest_match, find_number
+from src.item.descr.reread import ReadAttempt, read_regions
+from src.item.descr.text import clean_str, find_number
 from src.item.descr.texture import find_aspect_search_area
 from src.template_finder import TemplateMatch
-from src.utils.image_operations import crop
-from src.utils.ocr.read import image_to_text
+from src.utils.ocr.read import OcrSession
 
 LOGGER = logging.getLogger(__name__)
 
 
-def find_aspect(img_item_descr: np.ndarray, aspect_bullet: TemplateMatch, do_pre_proc: bool = True) -> tuple[Aspect | None, str]:
+def find_aspect(
+    img_item_descr: np.ndarray, aspect_bullet: TemplateMatch, do_pre_proc: bool = True, ocr_session: OcrSession | None = None
+) -> tuple[Aspect | None, str]:
     if aspect_bullet is None:
         return None, ""
 
+    ocr_session = ocr_session or OcrSession(img_item_descr)
     roi_aspect = find_aspect_search_area(img_item_descr, aspect_bullet)
-    img_full_aspect = crop(img_item_descr, roi_aspect)
-    concatenated_str = image_to_text(img_full_aspect, do_pre_proc=do_pre_proc).text.lower().replace("\n", " ")
-    cleaned_str = clean_str(concatenated_str)
-
-    cleaned_str = cleaned_str[:AFFIX_COMPARISON_CHARS]
-    found_key = closest_match(cleaned_str, Dataloader().aspect_unique_dict)
+    # the aspect is read once more with the other preprocessing variant if it could not be matched
+    attempt = read_regions(
+        [roi_aspect], lambda roi, roi_do_pre_proc: _read_aspect(ocr_session, roi, roi_do_pre_proc), _match_aspects, do_pre_proc
+    )[0]
+    concatenated_str, found_key = attempt.text, attempt.key
+    cleaned_str = clean_str(concatenated_str)[:AFFIX_COMPARISON_CHARS]
     num_idx = Dataloader().aspect_unique_num_idx
 
     if found_key is None:
@@ -39,3 +42,14 @@ def find_aspect(img_item_descr: np.ndarray, aspect_bullet: TemplateMatch, do_pre
 
     loc = (aspect_bullet.center[0], aspect_bullet.center[1] - 2)
     return Aspect(name=found_key, value=found_value, text=concatenated_str, loc=loc), cleaned_str
+
+
+def _read_aspect(ocr_session: OcrSession, roi_aspect: tuple[int, int, int, int], do_pre_proc: bool) -> ReadAttempt:
+    res = ocr_session.read(roi_aspect, do_pre_proc=do_pre_proc)
+    return ReadAttempt(text=res.text.lower().replace("\n", " "), do_pre_proc=do_pre_proc, ocr_result=res)
+
+
+def _match_aspects(attempts: list[ReadAttempt]):
+    matches = Dataloader().aspect_unique_matcher.match_many([clean_str(attempt.text)[:AFFIX_COMPARISON_CHARS] for attempt in attempts])
+    for attempt, (found_key, distance) in zip(attempts, matches, strict=True):
+        attempt.key, attempt.distance = found_key, distance
@@ -7,16 +7,21 @@ from src.dataloader import Dataloader
 from src.item.models import Item, ItemRarity, ItemType
 from src.template_finder import TemplateMatch
 from src.utils.image_operations import color_filter, crop
-from src.utils.ocr.read import image_to_text
+from src.utils.ocr.read import OcrSession, image_to_text
 
 
 def read_item_type_and_rarity(
-    item: Item, img_item_descr: np.ndarray, sep_short_match: TemplateMatch, do_pre_proc: bool = True
+    item: Item,
+    img_item_descr: np.ndarray,
+    sep_short_match: TemplateMatch,
+    do_pre_proc: bool = True,
+    ocr_session: OcrSession | None = None,
 ) -> tuple[Item | None, str]:
     _, img_width, _ = img_item_descr.shape
     roi_top = [0, 0, int(img_width * 0.74), sep_short_match.region[1]]
     crop_top = crop(img_item_descr, roi_top)
-    concatenated_str = image_to_text(crop_top, do_pre_proc=do_pre_proc).text.lower().replace("\n", " ")
+    ocr_session = ocr_session or OcrSession(img_item_descr)
+    concatenated_str = ocr_session.read(roi_top, do_pre_proc=do_pre_proc).text.lower().replace("\n", " ")
     for error, correction in Dataloader().error_map.items():
         concatenated_str = concatenated_str.replace(error, correction)
 
@@ -0,0 +1,54 @@
+import numpy as np
+import rapidfuzz
+import rapidfuzz.distance.Levenshtein
+
+
+class FuzzyMatcher:
+    """
+    Finds the candidate with the smallest Levenshtein distance to a text. The candidates are indexed once, Dataloader creates one
+    matcher per dictionary of the language data.
+    :param candidates: Texts to match against by the key that is returned for them
+    :param score_cutoff: Largest distance of a match, None to always return the closest candidate
+    """
+
+    def __init__(self, candidates: dict[str, str], score_cutoff: int | None = 100):
+        self.keys = list(candidates)
+        self.values = list(candidates.values())
+        self.score_cutoff = score_cutoff
+        # the first key of each value, candidates can share a text
+        self._key_by_value: dict[str, str] = {}
+        for key, value in candidates.items():
+            self._key_by_value.setdefault(value, key)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def match(self, target: str) -> tuple[str | None, int | None]:
+        """:return: Key of the closest candidate and its distance to the target or None, None if no candidate is close enough"""
+        result = rapidfuzz.process.extractOne(
+            target, self.values, scorer=rapidfuzz.distance.Levenshtein.distance, score_cutoff=self.score_cutoff
+        )
+        return (self._key_by_value[result[0]], int(result[1])) if result else (None, None)
+
+    def match_many(self, targets: list[str], workers: int = -1) -> list[tuple[str | None, int | None]]:
+        """
+        Matches all targets with one distance matrix, the results are the same as of match() for each target
+        :param targets: E.g. the texts of all affixes of an item
+        :param workers: Threads that compute the distances, -1 uses all cores
+        :return: Key and distance of the closest candidate per target, see match()
+        """
+        if not targets or not self.values:
+            return [(None, None)] * len(targets)
+        distances = rapidfuzz.process.cdist(
+            targets, self.values, scorer=rapidfuzz.distance.Levenshtein.distance, score_cutoff=self.score_cutoff, workers=workers
+        )
+        # like match(), the first candidate wins if several have the smallest distance
+        best = np.argmin(distances, axis=1)
+        results = []
+        for row, idx in enumerate(best):
+            distance = int(distances[row, idx])
+            if self.score_cutoff is not None and distance > self.score_cutoff:
+                results.append((None, None))
+            else:
+                results.append((self._key_by_value[self.values[idx]], distance))
+        return results
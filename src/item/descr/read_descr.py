@@ -17,6 +17,7 @@ from src.item.descr.texture import (
     find_seperators_long,
 )
 from src.item.models import Item
+from src.utils.ocr.read import OcrSession
 from src.utils.window import screenshot
 
 LOGGER = logging.getLogger(__name__)
@@ -35,12 +36,14 @@ def read_descr(rarity: ItemRarity, img_item_descr: np.ndarray, show_warnings: bo
         return None
 
     futures["sep_long"] = TP.submit(find_seperators_long, img_item_descr, sep_short_match)
+    # all regions of the description are read from the same image
+    ocr_session = OcrSession(img_item_descr)
     # Find item type and item power / tier list
     # =========================
-    item, item_type_str = read_item_type_and_rarity(base_item, img_item_descr, sep_short_match, do_pre_proc=False)
+    item, item_type_str = read_item_type_and_rarity(base_item, img_item_descr, sep_short_match, do_pre_proc=False, ocr_session=ocr_session)
     # In case it was not successful, try with doing image pre-processing
     if item is None:
-        item, item_type_str = read_item_type_and_rarity(base_item, img_item_descr, sep_short_match)
+        item, item_type_str = read_item_type_and_rarity(base_item, img_item_descr, sep_short_match, ocr_session=ocr_session)
     if item is None:
         if show_warnings:
             LOGGER.warning(f"Could not detect ItemPower and ItemType: {item_type_str}")
@@ -117,16 +120,8 @@ def read_descr(rarity: ItemRarity, img_item_descr: np.ndarray, show_warnings: bo
                 bottom_limit=bottom_limit,
                 is_sigil=is_sigil,
                 is_inherent=True,
+                ocr_session=ocr_session,
             )
-            if i_inherent is None:
-                i_inherent, debug_str = find_affixes(
-                    img_item_descr=img_item_descr,
-                    affix_bullets=inherent_affix_bullets,
-                    bottom_limit=bottom_limit,
-                    is_sigil=is_sigil,
-                    is_inherent=True,
-                    do_pre_proc_flag=False,
-                )
             return i_inherent, debug_str
         return [], ""
 
@@ -148,15 +143,8 @@ def read_descr(rarity: ItemRarity, img_item_descr: np.ndarray, show_warnings: bo
             affix_bullets=affix_bullets,
             bottom_limit=bottom_limit,
             is_sigil=is_sigil,
+            ocr_session=ocr_session,
         )
-        if i_affixes is None:
-            i_affixes, debug_str = find_affixes(
-                img_item_descr=img_item_descr,
-                affix_bullets=affix_bullets,
-                bottom_limit=bottom_limit,
-                is_sigil=is_sigil,
-                do_pre_proc_flag=False,
-            )
         return i_affixes, debug_str
 
     futures["affixes"] = TP.submit(_get_affixes)
@@ -164,29 +152,15 @@ def read_descr(rarity: ItemRarity, img_item_descr: np.ndarray, show_warnings: bo
     # Find aspects of uniques
     # =========================
     if rarity in [ItemRarity.Unique, ItemRarity.Mythic]:
-        item.aspect, debug_str = find_aspect(img_item_descr, aspect_bullet)
-        if item.aspect is None:
-            item.aspect, debug_str = find_aspect(img_item_descr, aspect_bullet, False)
+        item.aspect, debug_str = find_aspect(img_item_descr, aspect_bullet, ocr_session=ocr_session)
         if item.aspect is None:
             if show_warnings:
                 LOGGER.warning(f"Could not find unique: {debug_str}")
                 screenshot("failed_aspect_or_unique", img=img_item_descr)
             return None
 
-    item.affixes, debug_str = futures["affixes"].result()
-    if item.affixes is None:
-        if show_warnings:
-            LOGGER.warning(f"Could not find affix: {debug_str}")
-            screenshot("failed_affixes", img=img_item_descr)
-        return None
-
-    item.inherent, debug_str = futures["inherent"].result()
-    if item.inherent is None:
-        if show_warnings:
-            LOGGER.warning(f"Could not find inherent: {debug_str}")
-            screenshot("failed_inherent", img=img_item_descr)
-        return None
-
+    item.affixes, _ = futures["affixes"].result()
+    item.inherent, _ = futures["inherent"].result()
     item.codex_upgrade = futures["codex_upgrade"].result()
 
     return item
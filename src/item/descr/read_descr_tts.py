@@ -14,7 +14,7 @@ from src.item.data.aspect import Aspect
 from src.item.data.item_type import ItemType, is_armor, is_consumable, is_jewelry, is_mapping, is_socketable, is_weapon
 from src.item.data.rarity import ItemRarity
 from src.item.descr import keep_letters_and_spaces
-from src.item.descr.text import clean_str, closest_match, find_number
+from src.item.descr.text import clean_str, find_number
 from src.item.descr.texture import find_affix_bullets, find_aspect_bullet, find_seperator_short, find_seperators_long
 from src.item.models import Item
 from src.template_finder import TemplateMatch
@@ -49,16 +49,17 @@ def _add_affixes_from_tts(tts_section: list[str], item: Item) -> Item:
     elif item.item_type in [ItemType.Shield]:
         inherent_num = 4
     affixes = _get_affixes_from_tts_section(tts_section, item, inherent_num + affixes_num)
+    names = _get_affix_names(affixes[: inherent_num + affixes_num])
     for i, affix_text in enumerate(affixes):
         if i < inherent_num:
-            affix = _get_affix_from_text(affix_text)
+            affix = _get_affix_from_text(affix_text, names[i])
             affix.type = AffixType.inherent
             item.inherent.append(affix)
         elif i < inherent_num + affixes_num:
-            affix = _get_affix_from_text(affix_text)
+            affix = _get_affix_from_text(affix_text, names[i])
             item.affixes.append(affix)
         else:
-            name = closest_match(clean_str(affix_text)[:AFFIX_COMPARISON_CHARS], Dataloader().aspect_unique_dict)
+            name, _ = Dataloader().aspect_unique_matcher.match(clean_str(affix_text)[:AFFIX_COMPARISON_CHARS])
             item.aspect = Aspect(
                 name=name,
                 text=affix_text,
@@ -80,14 +81,15 @@ def _add_affixes_from_tts_mixed(
         len(inherent_affix_bullets)
         + len([x for x in affix_bullets if any(x.name.startswith(s) for s in ["affix", "greater_affix", "rerolled"])]),
     )
+    names = _get_affix_names(affixes[: len(inherent_affix_bullets) + len(affix_bullets)])
     for i, affix_text in enumerate(affixes):
         if i < len(inherent_affix_bullets):
-            affix = _get_affix_from_text(affix_text)
+            affix = _get_affix_from_text(affix_text, names[i])
             affix.type = AffixType.inherent
             affix.loc = inherent_affix_bullets[i].center
             item.inherent.append(affix)
         elif i < len(inherent_affix_bullets) + len(affix_bullets):
-            affix = _get_affix_from_text(affix_text)
+            affix = _get_affix_from_text(affix_text, names[i])
             affix.loc = affix_bullets[i - len(inherent_affix_bullets)].center
             if affix_bullets[i - len(inherent_affix_bullets)].name.startswith("greater_affix"):
                 affix.type = AffixType.greater
@@ -97,7 +99,7 @@ def _add_affixes_from_tts_mixed(
                 affix.type = AffixType.normal
             item.affixes.append(affix)
         else:
-            name = closest_match(clean_str(affix_text)[:AFFIX_COMPARISON_CHARS], Dataloader().aspect_unique_dict)
+            name, _ = Dataloader().aspect_unique_matcher.match(clean_str(affix_text)[:AFFIX_COMPARISON_CHARS])
             item.aspect = Aspect(
                 name=name,
                 loc=aspect_bullet.center,
@@ -178,8 +180,18 @@ def _get_affixes_from_tts_section(tts_section: list[str], item: Item, length: in
     return tts_section[start : start + length]
 
 
-def _get_affix_from_text(text: str) -> Affix:
-    result = Affix(text=text)
+def _get_affix_names(affix_texts: list[str]) -> list[str]:
+    """Names of all affixes of an item, they are matched at once"""
+    queries = []
+    for text in affix_texts:
+        for x in _AFFIX_REPLACEMENTS:
+            text = text.replace(x, "")
+        queries.append(keep_letters_and_spaces(text))
+    return [name for name, _ in Dataloader().affix_key_matcher.match_many(queries)]
+
+
+def _get_affix_from_text(text: str, name: str) -> Affix:
+    result = Affix(name=name, text=text)
     for x in _AFFIX_REPLACEMENTS:
         text = text.replace(x, "")
     matched_groups = {}
@@ -208,9 +220,6 @@ def _get_affix_from_text(text: str) -> Affix:
     if matched_groups.get("onlyvalue") is not None:
         result.min_value = float(matched_groups.get("onlyvalue"))
         result.max_value = float(matched_groups.get("onlyvalue"))
-    result.name = rapidfuzz.process.extractOne(
-        keep_letters_and_spaces(text), list(Dataloader().affix_dict), scorer=rapidfuzz.distance.Levenshtein.distance
-    )[0]
     return result
 
 
@@ -0,0 +1,60 @@
+import concurrent.futures
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.utils.ocr.models import OcrResult
+
+LOGGER = logging.getLogger(__name__)
+
+# a match with typos is uncertain if tesseract was not sure about one of the words
+MIN_WORD_CONFIDENCE = 60
+
+# regions are read from tasks that already run on TP, waiting for reads on TP as well could use up all of its workers
+_READ_TP = concurrent.futures.ThreadPoolExecutor(thread_name_prefix="ReadRegions")
+
+
+@dataclass
+class ReadAttempt:
+    """Text that was read from a region of the item description and the key of the language data it matched"""
+
+    text: str
+    key: str | None = None
+    distance: int | None = None
+    do_pre_proc: bool = True
+    ocr_result: OcrResult = field(default_factory=OcrResult)
+
+    def needs_reread(self) -> bool:
+        if self.key is None:
+            return True
+        confidences = self.ocr_result.word_confidences
+        return self.distance > 0 and isinstance(confidences, list) and any(conf < MIN_WORD_CONFIDENCE for conf in confidences)
+
+    def is_better_than(self, other: "ReadAttempt") -> bool:
+        return self.key is not None and (other.key is None or self.distance < other.distance)
+
+
+def read_regions(
+    regions: list[Any], read: Callable[[Any, bool], ReadAttempt], match: Callable[[list[ReadAttempt]], None], do_pre_proc: bool
+) -> list[ReadAttempt]:
+    """
+    Reads all regions concurrently and reads the regions that failed or are uncertain once more with the other preprocessing variant.
+    The attempt with the closer match is kept, the regions that were read fine are not read again.
+    :param regions: E.g. crops of the image, passed to read
+    :param read: Reads a region, with or without preprocessing
+    :param match: Matches the texts of all attempts at once and sets their keys and distances
+    :param do_pre_proc: Preprocessing variant of the first attempt
+    :return: One attempt per region
+    """
+    attempts = list(_READ_TP.map(lambda region: read(region, do_pre_proc), regions))
+    match(attempts)
+    retry = [i for i, attempt in enumerate(attempts) if attempt.needs_reread()]
+    if retry:
+        rereads = list(_READ_TP.map(lambda i: read(regions[i], not do_pre_proc), retry))
+        match(rereads)
+        for i, reread in zip(retry, rereads, strict=True):
+            if reread.is_better_than(attempts[i]):
+                LOGGER.debug(f"Reread with do_pre_proc={reread.do_pre_proc}: {attempts[i].text!r} -> {reread.text!r}")
+                attempts[i] = reread
+    return attempts
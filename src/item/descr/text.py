@@ -1,17 +1,8 @@
 import re
 
-import rapidfuzz
-import rapidfuzz.distance.Levenshtein
-
 from src.dataloader import Dataloader
 
 
-def closest_match(target, candidates):
-    keys, values = zip(*candidates.items(), strict=False)
-    result = rapidfuzz.process.extractOne(target, values, scorer=rapidfuzz.distance.Levenshtein.distance, score_cutoff=100)
-    return keys[values.index(result[0])] if result else None
-
-
 def closest_to(value, choices):
     return min(choices, key=lambda x: abs(x - value))
 
@@ -1,10 +1,8 @@
-import math
-
 import numpy as np
 
 from src.config.data import COLORS
 from src.config.ui import ResManager
-from src.template_finder import TemplateMatch, search
+from src.template_finder import TemplateMatch, filter_close_matches, search
 from src.utils.image_operations import color_filter, crop
 
 
@@ -13,19 +11,7 @@ def find_seperators_long(img_item_descr: np.ndarray, sep_short_match: TemplateMa
     roi = [0, sep_short_match.center[1], img_item_descr.shape[1], img_item_descr.shape[0] - sep_short_match.center[1]]
     if not (sep_long := search(refs, img_item_descr, 0.80, roi, True, mode="all", do_multi_process=False)).success:
         return None
-    matches_dict = {}
-    for match in sep_long.matches:
-        match_exists = False
-        for center in matches_dict:
-            if math.sqrt((center[0] - match.center[0]) ** 2 + (center[1] - match.center[1]) ** 2) <= 10:
-                if match.score > matches_dict[center].score:
-                    matches_dict[center] = match
-                match_exists = True
-                break
-        if not match_exists:
-            matches_dict[match.center] = match
-    filtered_matches = list(matches_dict.values())
-    return sorted(filtered_matches, key=lambda match: match.center[1])
+    return sorted(filter_close_matches(sep_long.matches, 10), key=lambda match: match.center[1])
 
 
 def find_seperator_short(img_item_descr: np.ndarray) -> TemplateMatch:
@@ -69,20 +55,8 @@ def _find_bullets(
     if not all_bullets.success:
         return []
     all_bullets.matches = _filter_outliers(all_bullets.matches)
-    # go through the matches and filter out the ones that are too close to each other. only keep the one with higher probability
-    matches_dict = {}
-    for match in all_bullets.matches:
-        match_exists = False
-        for center in matches_dict:
-            if math.sqrt((center[0] - match.center[0]) ** 2 + (center[1] - match.center[1]) ** 2) <= 10:
-                if match.score > matches_dict[center].score:
-                    matches_dict[center] = match
-                match_exists = True
-                break
-        if not match_exists:
-            matches_dict[match.center] = match
-    filtered_matches = list(matches_dict.values())
-    return sorted(filtered_matches, key=lambda match: match.center[1])
+    # filter out matches that are too close to each other. only keep the one with higher probability
+    return sorted(filter_close_matches(all_bullets.matches, 10), key=lambda match: match.center[1])
 
 
 def find_affix_bullets(img_item_descr: np.ndarray, sep_short_match: TemplateMatch) -> list[TemplateMatch]:
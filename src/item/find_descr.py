@@ -2,6 +2,7 @@ from copy import copy
 
 import numpy as np
 
+from src.cam import Cam
 from src.config.ui import ResManager
 from src.item.data.rarity import ItemRarity
 from src.template_finder import SearchResult, search
@@ -31,17 +32,43 @@ def _choose_best_result(res_left: SearchResult, res_right: SearchResult) -> Sear
 def _template_search(img: np.ndarray, anchor: int, roi: np.ndarray):
     roi_copy = copy(roi)
     roi_copy[0] += anchor
-    ok, roi_left = fit_roi_to_window_size(roi_copy, ResManager().pos.window_dimensions)
+    ok, roi_left = fit_roi_to_window_size(roi_copy, (img.shape[1], img.shape[0]))
     if ok:
-        return search(ref=list(map_template_rarity.keys()), inp_img=img, roi=roi_left, threshold=0.8, mode="all")
+        return search(ref=list(map_template_rarity.keys()), inp_img=img, roi=roi_left, threshold=0.8, mode="all", pyramid_levels=1)
     return SearchResult(success=False)
 
 
-def find_descr(img: np.ndarray, anchor: tuple[int, int]) -> tuple[bool, ItemRarity, np.ndarray, tuple[int, int, int, int]]:
+def descr_roi(anchor: tuple[int, int]) -> np.ndarray:
+    """Region of the window that contains the description of the item at anchor, no matter on which side it is shown"""
+    item_descr_width = ResManager().offsets.item_descr_width
+    delta_x = int(item_descr_width * 0.03)
+    left, right = ResManager().roi.rel_descr_search_left, ResManager().roi.rel_descr_search_right
+    x0 = anchor[0] + left[0] - delta_x
+    x1 = anchor[0] + right[0] + right[2] + item_descr_width + delta_x
+    return Cam().clip_to_window([x0, 0, x1 - x0, ResManager().pos.window_dimensions[1]])
+
+
+def find_descr(
+    img: np.ndarray | None, anchor: tuple[int, int], origin_x: int = 0
+) -> tuple[bool, ItemRarity, np.ndarray, tuple[int, int, int, int]]:
+    """
+    Finds the description of an item
+    :param img: Image of the window or of descr_roi(anchor). If None, only the region that can contain the description is grabbed
+    :param anchor: Center of the item
+    :param origin_x: Left edge of img in the window if it is a grab of descr_roi(anchor)
+    :return: Success, rarity of the item, image of the description and its region in window coordinates
+    """
     item_descr_width = ResManager().offsets.item_descr_width
     item_descr_pad = ResManager().offsets.item_descr_pad
     _, window_height = ResManager().pos.window_dimensions
 
+    # search in coordinates of img, descriptions are full window height, so only x can be offset
+    if img is None:
+        search_roi = descr_roi(anchor)
+        img = Cam().grab(roi=search_roi)
+        origin_x = int(search_roi[0])
+    anchor = (anchor[0] - origin_x, anchor[1])
+
     res_left = _template_search(img, anchor[0], ResManager().roi.rel_descr_search_left)
     res_right = _template_search(img, anchor[0], ResManager().roi.rel_descr_search_right)
 
@@ -64,7 +91,9 @@ def find_descr(img: np.ndarray, anchor: tuple[int, int]) -> tuple[bool, ItemRari
             off_bottom_of_descr = ResManager().offsets.item_descr_off_bottom_edge
             roi_height = ResManager().pos.window_dimensions[1] - (2 * off_bottom_of_descr) - match.region[1]
             if (
-                res_bottom := search(ref=["item_bottom_edge"], inp_img=img, roi=roi, threshold=0.54, use_grayscale=True, mode="all")
+                res_bottom := search(
+                    ref=["item_bottom_edge"], inp_img=img, roi=roi, threshold=0.54, use_grayscale=True, mode="all", pyramid_levels=1
+                )
             ).success:
                 roi_height = res_bottom.matches[0].center[1] - off_bottom_of_descr - match.region[1]
             crop_roi = [
@@ -74,6 +103,7 @@ def find_descr(img: np.ndarray, anchor: tuple[int, int]) -> tuple[bool, ItemRari
                 roi_height,
             ]
             cropped_descr = crop(img, crop_roi)
+            crop_roi[0] += origin_x
             return True, rarity, cropped_descr, crop_roi
 
     return False, None, None, None
@@ -3,6 +3,7 @@ import os
 import sys
 import time
 import traceback
+from pathlib import Path
 
 from beautifultable import BeautifulTable
 from PIL import Image  # noqa #  Note: Somehow needed, otherwise the binary has an issue with tesserocr
@@ -17,17 +18,30 @@ from src.item.filter import Filter
 from src.logger import LOG_DIR
 from src.overlay import Overlay
 from src.scripts.handler import ScriptHandler
+from src.session import start_recording, stop_recording
+from src.template_finder import TEMPLATE_STATS
+from src.utils.ocr.read import OCR_CACHE, APIPool
+from src.utils.process_handler import register_shutdown_hook
 from src.utils.window import WindowSpec, start_detecting_window
 
 LOGGER = logging.getLogger(__name__)
 
 
-def main():
+def log_stats():
+    """Writes the stats of template matching and OCR of the session, called on shutdown"""
+    TEMPLATE_STATS.dump(LOG_DIR / "template_stats.json")
+    APIPool().log_stats()
+    OCR_CACHE.log_stats()
+
+
+def main(record_path: Path | None = None):
     # Create folders for logging stuff
     for dir_name in [LOG_DIR / "screenshots", IniConfigLoader().user_dir, IniConfigLoader().user_dir / "profiles"]:
         os.makedirs(dir_name, exist_ok=True)
 
     LOGGER.info(f"Adapt your configs via gui.bat or directly in: {IniConfigLoader().user_dir}")
+    APIPool().warm_up()
+    register_shutdown_hook(log_stats)
 
     if IniConfigLoader().advanced_options.vision_mode_only:
         LOGGER.info("Vision mode only is enabled. All functionality that clicks the screen is disabled.")
@@ -53,6 +67,11 @@ def main():
     start_detecting_window(win_spec)
     while not Cam().is_offset_set():
         time.sleep(0.2)
+    if IniConfigLoader().advanced_options.capture_fps > 0:
+        Cam().start_capture(IniConfigLoader().advanced_options.capture_fps)
+    if record_path is not None:
+        start_recording(record_path)
+        register_shutdown_hook(lambda: stop_recording(archive=True))
 
     ScriptHandler()
 
@@ -68,8 +87,11 @@ if __name__ == "__main__":
     src.logger.setup(log_level=IniConfigLoader().advanced_options.log_lvl.value)
     if len(sys.argv) > 1 and sys.argv[1] == "--gui":
         start_gui()
+    record_path = None
+    if len(sys.argv) > 1 and sys.argv[1] == "--record":
+        record_path = Path(sys.argv[2]) if len(sys.argv) > 2 else LOG_DIR / "sessions" / time.strftime("%Y_%m_%d_%H_%M_%S")
     try:
-        main()
+        main(record_path)
     except Exception:
         traceback.print_exc()
         print("Press Enter to exit ...")
@@ -4,18 +4,21 @@ import time
 import keyboard
 
 from src.cam import Cam
+from src.session import record_event
 from src.utils.custom_mouse import mouse
 
 LOGGER = logging.getLogger(__name__)
 
 
 def mark_as_junk():
+    record_event("decision", action="junk")
     keyboard.send("space")
     time.sleep(0.13)
 
 
 def mark_as_favorite():
     LOGGER.info("Mark as favorite")
+    record_event("decision", action="favorite")
     keyboard.send("space")
     time.sleep(0.17)
     keyboard.send("space")
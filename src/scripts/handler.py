@@ -16,6 +16,7 @@ from src.cam import Cam
 from src.config.loader import IniConfigLoader
 from src.config.models import ItemRefreshType, UseTTSType
 from src.loot_mover import move_items_to_inventory, move_items_to_stash
+from src.session import record_event
 from src.ui.char_inventory import CharInventory
 from src.ui.chest import Chest
 from src.utils.custom_mouse import mouse
@@ -37,20 +38,24 @@ class ScriptHandler:
             self.run_scripts()
 
     def setup_key_binds(self):
-        keyboard.add_hotkey(IniConfigLoader().advanced_options.run_scripts, lambda: self.run_scripts())
-        keyboard.add_hotkey(IniConfigLoader().advanced_options.exit_key, lambda: safe_exit())
+        self._add_hotkey("run_scripts", lambda: self.run_scripts())
+        self._add_hotkey("exit_key", lambda: safe_exit())
         if not IniConfigLoader().advanced_options.vision_mode_only:
-            keyboard.add_hotkey(IniConfigLoader().advanced_options.run_filter, lambda: self.filter_items())
-            keyboard.add_hotkey(
-                IniConfigLoader().advanced_options.run_filter_force_refresh,
-                lambda: self.filter_items(ItemRefreshType.force_with_filter),
-            )
-            keyboard.add_hotkey(
-                IniConfigLoader().advanced_options.force_refresh_only,
-                lambda: self.filter_items(ItemRefreshType.force_without_filter),
-            )
-            keyboard.add_hotkey(IniConfigLoader().advanced_options.move_to_inv, lambda: self.move_items_to_inventory())
-            keyboard.add_hotkey(IniConfigLoader().advanced_options.move_to_chest, lambda: self.move_items_to_stash())
+            self._add_hotkey("run_filter", lambda: self.filter_items())
+            self._add_hotkey("run_filter_force_refresh", lambda: self.filter_items(ItemRefreshType.force_with_filter))
+            self._add_hotkey("force_refresh_only", lambda: self.filter_items(ItemRefreshType.force_without_filter))
+            self._add_hotkey("move_to_inv", lambda: self.move_items_to_inventory())
+            self._add_hotkey("move_to_chest", lambda: self.move_items_to_stash())
+
+    @staticmethod
+    def _add_hotkey(action: str, callback: typing.Callable):
+        """Binds the hotkey of the option action in advanced_options, triggered hotkeys are recorded in sessions"""
+
+        def _on_hotkey():
+            record_event("hotkey", action=action)
+            callback()
+
+        keyboard.add_hotkey(getattr(IniConfigLoader().advanced_options, action), _on_hotkey)
 
     def filter_items(self, force_refresh=ItemRefreshType.no_refresh):
         if IniConfigLoader().general.use_tts in [UseTTSType.full, UseTTSType.mixed]:
@@ -8,7 +8,7 @@ from src.item.data.item_type import ItemType
 from src.item.data.rarity import ItemRarity
 from src.item.descr.read_descr import read_descr
 from src.item.filter import Filter
-from src.item.find_descr import find_descr
+from src.item.find_descr import descr_roi, find_descr
 from src.scripts.common import mark_as_favorite, mark_as_junk, reset_item_status
 from src.ui.inventory_base import InventoryBase
 from src.utils.image_operations import compare_histograms
@@ -49,12 +49,14 @@ def check_items(inv: InventoryBase, force_refresh: ItemRefreshType):
                 break
             inv.hover_item(item)
             time.sleep(0.2)
-            img = Cam().grab()
+            # keep the image that is searched, so a failed detection can be saved
+            search_roi = descr_roi(item.center)
+            img = Cam().grab(roi=search_roi)
             start_detect = time.time()
-            found, rarity, cropped_descr, _ = find_descr(img, item.center)
+            found, rarity, cropped_descr, _ = find_descr(img, item.center, int(search_roi[0]))
             if found:
                 # To avoid getting an image that is taken while the fade-in animation of the item is showing
-                found_check, _, cropped_descr_check, _ = find_descr(Cam().grab(), item.center)
+                found_check, _, cropped_descr_check, _ = find_descr(None, item.center)
                 if found_check:
                     score = compare_histograms(cropped_descr, cropped_descr_check)
                     if score < 0.99:
@@ -70,7 +72,7 @@ def check_items(inv: InventoryBase, force_refresh: ItemRefreshType):
         if item_descr is None:
             LOGGER.info("Retry item detection")
             time.sleep(0.2)
-            found, rarity, cropped_descr, _ = find_descr(Cam().grab(), item.center)
+            found, rarity, cropped_descr, _ = find_descr(None, item.center)
             if found:
                 item_descr = read_descr(rarity, cropped_descr)
             if item_descr is None:
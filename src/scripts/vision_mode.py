@@ -17,12 +17,13 @@ from src.item.data.item_type import ItemType, is_armor, is_consumable, is_jewelr
 from src.item.data.rarity import ItemRarity
 from src.item.descr.read_descr import read_descr
 from src.item.filter import Filter
-from src.item.find_descr import find_descr
+from src.item.find_descr import descr_roi, find_descr
 from src.scripts.common import reset_canvas
+from src.session import record_event
 from src.ui.char_inventory import CharInventory
 from src.ui.chest import Chest
 from src.utils.custom_mouse import mouse
-from src.utils.image_operations import compare_histograms
+from src.utils.image_operations import FrameChangeDetector, compare_histograms
 from src.utils.window import screenshot
 
 LOGGER = logging.getLogger(__name__)
@@ -143,9 +144,10 @@ def vision_mode():
     # Each item must be detected twice and the image must match, this is to avoid
     # getting in item while the fade-in animation and failing to read it properly
     is_confirmed = False
+    # template matching and OCR only run if the description region changed since it was last processed
+    change_detector = FrameChangeDetector()
     while True:
         try:
-            img = Cam().grab()
             mouse_pos = Cam().monitor_to_window(mouse.get_position())
             # get closest pos to a item center
             delta = possible_centers - mouse_pos
@@ -154,17 +156,26 @@ def vision_mode():
             if distances[closest_index] > (max_slot_size * 1.3):
                 # avoid randomly looking for items if we are well outside
                 found = False
+                # nothing is grabbed, wait as long as a frame is cached
+                time.sleep(0.04)
+                change_detector.reset()
             else:
                 item_center = possible_centers[closest_index]
-                found, rarity, cropped_descr, item_roi = find_descr(img, item_center)
+                if not change_detector.has_changed(Cam().grab(roi=descr_roi(item_center)), key=tuple(item_center)):
+                    if change_detector.skipped % 500 == 0:
+                        LOGGER.debug(f"Vision mode: {change_detector}")
+                    time.sleep(0.04)
+                    continue
+                found, rarity, cropped_descr, item_roi = find_descr(None, item_center)
 
             top_left_corner = None if not found else item_roi[:2]
             if found:
                 if not is_confirmed:
-                    found_check, _, cropped_descr_check, _ = find_descr(Cam().grab(), item_center)
+                    found_check, _, cropped_descr_check, _ = find_descr(None, item_center)
                     if found_check:
                         score = compare_histograms(cropped_descr, cropped_descr_check)
                         if score < 0.99:
+                            change_detector.reset()
                             continue
                         is_confirmed = True
 
@@ -207,6 +218,7 @@ def vision_mode():
                         last_center = None
                         last_top_left_corner = None
                         is_confirmed = False
+                        change_detector.reset()
                         continue
 
                     ignored_item = False
@@ -234,6 +246,7 @@ def vision_mode():
                         ignored_item = True
 
                     if ignored_item:
+                        record_event("decision", action="ignore", roi=[int(v) for v in item_roi])
                         create_signal_rect(canvas, w, thick, "#00b3b3")
                         root.update_idletasks()
                         root.update()
@@ -251,6 +264,7 @@ def vision_mode():
 
                     # Adapt colors based on config
                     if match:
+                        record_event("decision", action="keep", roi=[int(v) for v in item_roi])
                         create_signal_rect(canvas, w, thick, "#23fc5d")
 
                         # show all info strings of the profiles
@@ -267,6 +281,7 @@ def vision_mode():
                             if item_descr.aspect is not None and any(m.did_match_aspect for m in res.matched):
                                 draw_rect(canvas, bullet_width, item_descr.aspect, off, "#23fc5d")
                     elif not match:
+                        record_event("decision", action="junk", roi=[int(v) for v in item_roi])
                         create_signal_rect(canvas, w, thick, "#fc2323")
 
                     root.update_idletasks()
@@ -279,4 +294,5 @@ def vision_mode():
                 time.sleep(0.15)
         except Exception:
             LOGGER.exception("Error in vision mode. Please create a bug report")
+            change_detector.reset()
             time.sleep(1)
@@ -0,0 +1,450 @@
+"""Recording of sessions and their replay without the game.
+
+A session is a directory, or a zip archive of it, with an events.jsonl that lists everything that was recorded in order and
+the grabbed frames as PNGs in frames/. A grab that is unchanged since the last grab of the same region refers to its PNG
+instead of storing it again. Every event is a JSON object with the seconds since the start of the recording "t",
+its "type" and the data of the type:
+
+- window: Window position "roi" as {"top", "left", "width", "height"}
+- frame: Grabbed image "file" and its region "roi" [left, top, width, height] in window coordinates or null for the window
+- mouse: Mouse position "pos" that was read
+- hotkey: Triggered "action", e.g. "run_filter"
+- decision: What was decided for an item, e.g. {"action": "junk"}
+
+Replaying a session serves the recorded frames and mouse positions in the recorded order to the same code, clicks and key
+presses are dropped. The decisions of the replay can then be compared with the recorded ones. Modules that can only be
+imported on Windows are replaced by stubs, so sessions can be replayed on other systems as well.
+"""
+
+import importlib
+import json
+import logging
+import shutil
+import sys
+import threading
+import time
+import types
+import typing
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.cam import Cam
+from src.capture import CaptureBackend, MssBackend
+
+LOGGER = logging.getLogger(__name__)
+
+EVENTS_FILE = "events.jsonl"
+FRAMES_DIR = "frames"
+# regions whose last frame is kept to detect unchanged grabs, e.g. the window, the inventory and the hovered item
+REFERENCE_FRAMES = 4
+
+_sink: typing.Callable[..., None] | None = None
+
+
+def record_event(event_type: str, **data):
+    """Records an event if a session is recorded or replayed, otherwise does nothing"""
+    if (sink := _sink) is not None:
+        sink(event_type, **data)
+
+
+class SessionRecorder:
+    """
+    Writes a session to a directory. Frames are encoded on a worker thread, so grabs are not slowed down by it.
+    :param path: Directory of the session, it is created
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        (self.path / FRAMES_DIR).mkdir(parents=True, exist_ok=True)
+        self._events = open(self.path / EVENTS_FILE, "w", encoding="utf-8")  # noqa: SIM115
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._num_frames = 0
+        self._num_grabs = 0
+        # last frame and its file per region, the oldest region first
+        self._references: dict[tuple[int, ...] | None, tuple[np.ndarray, str]] = {}
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SessionRecorder")
+
+    def record(self, event_type: str, **data):
+        with self._lock:
+            if self._events.closed:
+                return
+            self._events.write(json.dumps({"t": round(time.perf_counter() - self._start, 4), "type": event_type, **data}) + "\n")
+
+    def record_frame(self, img: np.ndarray, roi: np.ndarray | None = None):
+        key = None if roi is None else tuple(int(v) for v in roi)
+        with self._lock:
+            self._num_grabs += 1
+            reference = self._references.get(key)
+        # the frames are compared exactly, a replay has to see the same pixels as the recording
+        if reference is not None and np.array_equal(reference[0], img):
+            file = reference[1]
+        else:
+            # the image can be a view that changes later, e.g. of a ring buffer
+            img = img.copy()
+            with self._lock:
+                file = f"{FRAMES_DIR}/{self._num_frames:06d}.png"
+                self._num_frames += 1
+                self._references.pop(key, None)
+                self._references[key] = (img, file)
+                if len(self._references) > REFERENCE_FRAMES:
+                    del self._references[next(iter(self._references))]
+            self._writer.submit(cv2.imwrite, str(self.path / file), img, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        self.record("frame", file=file, roi=None if key is None else list(key))
+
+    def close(self, archive: bool = False) -> Path:
+        """
+        :param archive: Pack the session into a zip archive next to the directory and remove the directory
+        :return: Path of the session
+        """
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            self._events.close()
+            self._references.clear()
+        LOGGER.info(f"Recorded {self._num_grabs} frames, {self._num_frames} of them changed, to {self.path}")
+        if not archive:
+            return self.path
+        zip_path = Path(shutil.make_archive(str(self.path), "zip", self.path))
+        shutil.rmtree(self.path)
+        return zip_path
+
+
+class RecordingBackend(CaptureBackend):
+    """Records all frames that another backend grabs"""
+
+    def __init__(self, backend: CaptureBackend, recorder: SessionRecorder):
+        self.backend = backend
+        self.recorder = recorder
+
+    @property
+    def resolution(self) -> tuple[int, int] | None:
+        return self.backend.resolution
+
+    def grab(self, window_roi: dict, roi: np.ndarray | None = None) -> np.ndarray:
+        img = self.backend.grab(window_roi, roi)
+        self.recorder.record_frame(img, roi)
+        return img
+
+    def close(self):
+        self.backend.close()
+
+
+_recorder: SessionRecorder | None = None
+# mouse.get_position while no session is recorded
+_get_position: typing.Callable[[], tuple[int, int]] | None = None
+
+
+def start_recording(path: Path) -> SessionRecorder:
+    """Records the frames that Cam grabs, the mouse positions that are read and all recorded events to path"""
+    global _recorder, _sink, _get_position
+    # only recording needs the mouse, it can not be imported without Windows
+    from src.utils.custom_mouse import mouse
+
+    stop_recording()
+    _get_position = mouse.get_position
+    _recorder = SessionRecorder(path)
+    _recorder.record("window", roi=dict(Cam().window_roi))
+    Cam().set_backend(RecordingBackend(Cam().backend or MssBackend(), _recorder))
+
+    def _recorded_position():
+        pos = _get_position()
+        _recorder.record("mouse", pos=[int(v) for v in pos])
+        return pos
+
+    mouse.get_position = staticmethod(_recorded_position)
+    _sink = _recorder.record
+    LOGGER.info(f"Recording session to {path}")
+    return _recorder
+
+
+def stop_recording(archive: bool = False) -> Path | None:
+    """
+    :param archive: Pack the session into a zip archive
+    :return: Path of the session or None if no session was recorded
+    """
+    global _recorder, _sink
+    if _recorder is None:
+        return None
+    from src.utils.custom_mouse import mouse
+
+    _sink = None
+    mouse.get_position = staticmethod(_get_position)
+    if isinstance(Cam().backend, RecordingBackend):
+        Cam().set_backend(Cam().backend.backend)
+    path = _recorder.close(archive)
+    _recorder = None
+    return path
+
+
+class SessionReader:
+    """Reads a recorded session from its directory or zip archive"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._zip = zipfile.ZipFile(self.path) if self.path.is_file() else None
+        raw = self._zip.read(EVENTS_FILE).decode("utf-8") if self._zip else (self.path / EVENTS_FILE).read_text(encoding="utf-8")
+        self.events: list[dict] = [json.loads(line) for line in raw.splitlines() if line.strip()]
+
+    def read_frame(self, file: str) -> np.ndarray:
+        if self._zip is None:
+            img = cv2.imread(str(self.path / file))
+        else:
+            img = cv2.imdecode(np.frombuffer(self._zip.read(file), dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise FileNotFoundError(f"Could not load frame {file} of {self.path}")
+        return img
+
+    def of_type(self, event_type: str) -> list[dict]:
+        return [event for event in self.events if event["type"] == event_type]
+
+
+class SessionReplayBackend(CaptureBackend):
+    """
+    Serves the frames of a recorded session in order. A grab skips recorded frames that do not cover the requested region,
+    regions are cropped from recorded grabs of the whole window. Mouse positions are served from the same position in the
+    session, so they stay in sync with the frames. Grabs raise EOFError once all frames are served.
+    """
+
+    def __init__(self, reader: SessionReader):
+        self.reader = reader
+        self.finished = threading.Event()
+        self.num_frames = 0
+        self._cursor = 0
+        self._lock = threading.Lock()
+        self._last_pos = (0, 0)
+        windows = reader.of_type("window")
+        self._resolution = (windows[0]["roi"]["width"], windows[0]["roi"]["height"]) if windows else None
+
+    @property
+    def resolution(self) -> tuple[int, int] | None:
+        return self._resolution
+
+    def grab(self, window_roi: dict, roi: np.ndarray | None = None) -> np.ndarray:
+        with self._lock:
+            events = self.reader.events
+            while self._cursor < len(events):
+                event = events[self._cursor]
+                self._cursor += 1
+                if event["type"] == "mouse":
+                    self._last_pos = tuple(event["pos"])
+                elif event["type"] == "frame" and (img := self._covering(event, roi)) is not None:
+                    self.num_frames += 1
+                    return img
+            self.finished.set()
+            raise EOFError(f"No more frames in session {self.reader.path}")
+
+    def _covering(self, event: dict, roi: np.ndarray | None) -> np.ndarray | None:
+        recorded_roi = event["roi"]
+        if roi is None or recorded_roi is None:
+            if roi is None and recorded_roi is not None:
+                return None
+            img = self.reader.read_frame(event["file"])
+            return img if roi is None else img[roi[1] : roi[1] + roi[3], roi[0] : roi[0] + roi[2]]
+        if [int(v) for v in roi] != recorded_roi:
+            return None
+        return self.reader.read_frame(event["file"])
+
+    def get_position(self) -> tuple[int, int]:
+        """Next recorded mouse position, the last one if the next frame was recorded before the next mouse position"""
+        with self._lock:
+            events = self.reader.events
+            while self._cursor < len(events) and events[self._cursor]["type"] not in ("frame", "mouse"):
+                self._cursor += 1
+            if self._cursor >= len(events):
+                self.finished.set()
+            elif events[self._cursor]["type"] == "mouse":
+                self._last_pos = tuple(events[self._cursor]["pos"])
+                self._cursor += 1
+            return self._last_pos
+
+
+@dataclass
+class ReplayReport:
+    duration: float
+    num_frames: int
+    decisions: list[dict] = field(default_factory=list)
+    recorded_decisions: list[dict] = field(default_factory=list)
+
+    @property
+    def decisions_match(self) -> bool:
+        return self.decisions == self.recorded_decisions
+
+
+def _replay_loot_filter():
+    """Item checks of the loot filter like in a run of it, without the hotkey handling that needs Windows"""
+    from src.config.loader import IniConfigLoader
+    from src.config.models import ItemRefreshType
+    from src.scripts.loot_filter import check_items
+    from src.ui.char_inventory import CharInventory
+    from src.ui.chest import Chest
+
+    inv = CharInventory()
+    chest = Chest()
+    if chest.is_open():
+        for i in IniConfigLoader().general.check_chest_tabs:
+            chest.switch_to_tab(i)
+            check_items(chest, ItemRefreshType.no_refresh)
+    check_items(inv, ItemRefreshType.no_refresh)
+
+
+# modules that can only be imported on Windows, the scripts import them
+_WINDOWS_MODULES = ("win32file", "win32pipe", "keyboard", "src.utils.window", "src.utils.custom_mouse")
+_MOUSE_FUNCTIONS = ("move", "click", "press", "release", "wheel", "get_position")
+
+
+def _ignore(*args, **kwargs):
+    pass
+
+
+class _WindowsStub(types.ModuleType):
+    """Stands in for a module that can only be imported on Windows, all of its functions do nothing"""
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _ignore
+
+
+def _stub_windows_modules():
+    """
+    Replaces the modules that can not be imported on this system by stubs, so that scripts can be replayed without Windows. The
+    stubs stay in place, the modules can not be imported later on either.
+    """
+    for name in _WINDOWS_MODULES:
+        if name in sys.modules:
+            continue
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            # not only ImportError, e.g. src.utils.window uses ctypes.windll while it is imported
+            LOGGER.debug(f"Replace {name} by a stub: {e}")
+            stub = _WindowsStub(name)
+            if name == "src.utils.custom_mouse":
+                stub.mouse = type("mouse", (), {func: staticmethod(_ignore) for func in _MOUSE_FUNCTIONS})
+            sys.modules[name] = stub
+            parent, _, child = name.rpartition(".")
+            if parent:
+                setattr(sys.modules[parent], child, stub)
+
+
+def _load_script(script: str) -> typing.Callable[[], None]:
+    """
+    Imports a script on the main thread, as tesserocr can only be imported there
+    :param script: "loot_filter" or "vision_mode"
+    :return: Function that runs the script
+    """
+    _stub_windows_modules()
+    if script == "vision_mode":
+        from src.scripts.vision_mode import vision_mode
+
+        return vision_mode
+    import src.scripts.loot_filter  # noqa: F401
+
+    return _replay_loot_filter
+
+
+@contextmanager
+def _stubbed_input(backend: SessionReplayBackend):
+    """
+    Mouse and keyboard do nothing, mouse positions come from the session. Only the input modules that the script imported are
+    patched, the replay itself does not import them as they need Windows.
+    """
+    patches = []
+    if (custom_mouse := sys.modules.get("src.utils.custom_mouse")) is not None:
+        stubs = dict.fromkeys(_MOUSE_FUNCTIONS, _ignore) | {"get_position": backend.get_position}
+        for name, stub in stubs.items():
+            patches.append((custom_mouse.mouse, name, custom_mouse.mouse.__dict__[name]))
+            setattr(custom_mouse.mouse, name, staticmethod(stub))
+    if (keyboard := sys.modules.get("keyboard")) is not None:
+        patches.append((keyboard, "send", keyboard.send))
+        keyboard.send = lambda *args, **kwargs: None
+    try:
+        yield
+    finally:
+        for obj, name, original in reversed(patches):
+            setattr(obj, name, original)
+
+
+def replay_session(path: Path, script: str | None = None, timeout: float | None = None) -> ReplayReport:
+    """
+    Runs a script on a recorded session until its frames are used up
+    :param path: Directory or zip archive of the session
+    :param script: "loot_filter" or "vision_mode". If None, the script is chosen by the first recorded hotkey.
+    :param timeout: Seconds after which the replay is stopped
+    :return: Runtime, number of served frames and the decisions of the replay and of the recording
+    """
+    global _sink
+    reader = SessionReader(path)
+    if script is None:
+        hotkeys = [event["action"] for event in reader.of_type("hotkey")]
+        script = "vision_mode" if hotkeys and hotkeys[0] == "run_scripts" else "loot_filter"
+    target = _load_script(script)
+    backend = SessionReplayBackend(reader)
+    decisions = []
+    previous_backend = Cam().backend
+    Cam().set_backend(backend)
+
+    def _collect_decision(event_type: str, **data):
+        if event_type == "decision":
+            decisions.append(data)
+
+    def _run():
+        try:
+            target()
+        except EOFError:
+            LOGGER.debug("Session ended while the script was running")
+
+    _sink = _collect_decision
+    start = time.perf_counter()
+    try:
+        with _stubbed_input(backend):
+            thread = threading.Thread(target=_run, daemon=True)
+            thread.start()
+            while thread.is_alive():
+                if backend.finished.is_set():
+                    # the next grab raises EOFError, scripts that catch it and keep running are stopped below
+                    thread.join(1)
+                    break
+                if timeout is not None and time.perf_counter() - start > timeout:
+                    LOGGER.warning(f"Replay of {path} timed out")
+                    break
+                thread.join(0.05)
+            if thread.is_alive():
+                from src.utils.process_handler import kill_thread
+
+                kill_thread(thread)
+                thread.join(1)
+    finally:
+        _sink = None
+        Cam().set_backend(previous_backend or MssBackend())
+    report = ReplayReport(
+        duration=time.perf_counter() - start,
+        num_frames=backend.num_frames,
+        decisions=decisions,
+        recorded_decisions=[{k: v for k, v in event.items() if k not in ("t", "type")} for event in reader.of_type("decision")],
+    )
+    LOGGER.info(
+        f"Replayed {script} on {path}: {report.num_frames} frames in {report.duration:.2f}s, "
+        f"{len(report.decisions)} decisions, {'same as' if report.decisions_match else 'different from'} the recording"
+    )
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import src.logger
+
+    parser = argparse.ArgumentParser(description="Replay a recorded session")
+    parser.add_argument("path", type=Path, help="Directory or zip archive of the session")
+    parser.add_argument("--script", choices=["loot_filter", "vision_mode"], default=None)
+    parser.add_argument("--timeout", type=float, default=None)
+    args = parser.parse_args()
+    src.logger.setup(log_level="INFO")
+    replay_session(args.path, args.script, args.timeout)
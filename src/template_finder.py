@@ -1,7 +1,12 @@
+import collections
+import concurrent.futures
+import json
 import logging
 import threading
 import time
+from collections.abc import Callable
 from dataclasses import dataclass
+from pathlib import Path
 
 import cv2
 import numpy as np
@@ -18,6 +23,15 @@ LOGGER = logging.getLogger(__name__)
 
 TEMPLATES_LOCK = threading.Lock()
 
+# Coarse-to-fine search: templates are not downscaled below this size and candidates of the coarse level only need to reach
+# threshold - PYRAMID_THRESHOLD_MARGIN as downscaling smears thin template features
+PYRAMID_MIN_TEMPLATE_SIZE = 8
+PYRAMID_THRESHOLD_MARGIN = 0.15
+# If more than this fraction of the coarse result passes the candidate threshold, refining is slower than a full search
+PYRAMID_MAX_CANDIDATE_RATIO = 0.1
+# Pixels around the last known location of a template that are searched before falling back to the full roi
+LOCATION_CACHE_MARGIN = 6
+
 
 @dataclass
 class TemplateMatch:
@@ -41,6 +55,7 @@ class TemplateMatch:
 class SearchResult:
     matches: list[TemplateMatch] = None
     success: bool = False
+    evaluated_templates: int = 0
 
     def __post_init__(self):
         if self.matches is None:
@@ -60,6 +75,8 @@ class SearchArgs:
     timeout: int = 0
     suppress_debug: bool = True
     do_multi_process: bool = True
+    pyramid_levels: int = 0
+    use_location_cache: bool = False
 
     def __call__(self, cls):
         cls._search_args = self
@@ -71,8 +88,6 @@ class SearchArgs:
     def detect(self, img: np.ndarray = None) -> SearchResult:
         if img is not None:
             self.inp_img = img
-        else:
-            Cam().grab() if self.inp_img is None else self.inp_img
         return search(**self.as_dict())
 
     def is_visible(self, img: np.ndarray = None) -> bool:
@@ -106,6 +121,177 @@ class SearchArgs:
         return change
 
 
+class LocationCache:
+    """
+    Remembers where templates were last found per resolution and roi. Elements of the fixed UI are always drawn at the same
+    position, so a small window around the last match is searched first and the full roi only if the template is not there.
+    """
+
+    def __init__(self):
+        self._locations: dict[tuple, list[int]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(name: str, roi: list[int] | None) -> tuple:
+        return name, ResManager().resolution, None if roi is None else tuple(int(v) for v in roi)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._locations.clear()
+            self.hits = self.misses = 0
+
+    def get(self, name: str, roi: list[int] | None) -> list[int] | None:
+        return self._locations.get(self._key(name, roi))
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def update(self, name: str, roi: list[int] | None, region: list[int]):
+        with self._lock:
+            self._locations[self._key(name, roi)] = region
+
+
+LOCATION_CACHE = LocationCache()
+
+
+@dataclass
+class _TemplateRecord:
+    calls: int = 0
+    hits: int = 0
+    total_time: float = 0.0
+    total_roi_area: int = 0
+    durations: collections.deque = None
+
+
+class TemplateStats:
+    """Time spent in matching and hit rate per template name, to find the templates that dominate a session"""
+
+    def __init__(self, max_samples: int = 1000):
+        self._max_samples = max_samples
+        self._records: dict[str, _TemplateRecord] = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def record(self, name: str, duration: float, roi_area: int, hit: bool):
+        with self._lock:
+            if (record := self._records.get(name)) is None:
+                record = self._records[name] = _TemplateRecord(durations=collections.deque(maxlen=self._max_samples))
+            record.calls += 1
+            record.hits += hit
+            record.total_time += duration
+            record.total_roi_area += roi_area
+            record.durations.append(duration)
+
+    def get(self, name: str) -> dict | None:
+        """
+        :param name: Template name
+        :return: Number of calls and hits, hit rate, total and mean time as well as percentiles of the last max_samples calls in ms
+            and the mean roi area in pixels. None if the template was not matched yet
+        """
+        with self._lock:
+            if (record := self._records.get(name)) is None:
+                return None
+            p50, p90, p99 = np.percentile(np.array(record.durations) * 1000, [50, 90, 99])
+            return {
+                "calls": record.calls,
+                "hits": record.hits,
+                "hit_rate": record.hits / record.calls,
+                "total_ms": record.total_time * 1000,
+                "mean_ms": record.total_time * 1000 / record.calls,
+                "p50_ms": float(p50),
+                "p90_ms": float(p90),
+                "p99_ms": float(p99),
+                "mean_roi_area": record.total_roi_area / record.calls,
+            }
+
+    def summary(self) -> dict[str, dict]:
+        """Stats of all templates, sorted by total time"""
+        with self._lock:
+            names = list(self._records)
+        stats = {name: self.get(name) for name in names}
+        return dict(sorted(stats.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+
+    def dump(self, path: Path):
+        if not (stats := self.summary()):
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=4)
+        LOGGER.debug(f"Template stats written to {path}")
+
+
+TEMPLATE_STATS = TemplateStats()
+
+
+class FrameResultCache:
+    """
+    Results of searches on recent frames of Cam. Every grab of a region gets its own frame id, so the results of the last
+    max_frames frames are kept and the oldest frames are dropped first.
+    """
+
+    def __init__(self, max_frames: int = 8):
+        self._max_frames = max_frames
+        self._results: dict[int, dict[tuple, SearchResult]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, frame_id: int, key: tuple) -> SearchResult | None:
+        with self._lock:
+            if (result := self._results.get(frame_id, {}).get(key)) is None:
+                return None
+        return SearchResult(matches=list(result.matches), success=result.success)
+
+    def put(self, frame_id: int, key: tuple, result: SearchResult):
+        with self._lock:
+            if frame_id not in self._results:
+                # frame ids increase, a frame that is older than all kept ones must not evict newer results
+                if len(self._results) >= self._max_frames and frame_id < min(self._results):
+                    return
+                self._results[frame_id] = {}
+                while len(self._results) > self._max_frames:
+                    del self._results[min(self._results)]
+            self._results[frame_id][key] = SearchResult(matches=list(result.matches), success=result.success)
+
+
+FRAME_RESULTS = FrameResultCache()
+
+
+def _frame_cache_key(
+    ref: str | np.ndarray | list[str],
+    roi: list[float] | str | None,
+    color_match: list[float] | str | None,
+    *params: bool | float | int | str,
+) -> tuple | None:
+    """Key of a search in FrameResultCache or None if the search arguments can not be compared, e.g. if ref is an image"""
+    refs = ref if isinstance(ref, list) else [ref]
+    if not all(isinstance(r, str) for r in refs) or not (color_match is None or isinstance(color_match, str)):
+        return None
+    if roi is not None and not isinstance(roi, str):
+        roi = tuple(int(v) for v in roi)
+    return tuple(r.lower() for r in refs), roi, color_match, *params
+
+
+def _location_window(region: list[int], roi: list[int] | None, img_shape: tuple[int, ...]) -> list[int]:
+    bounds = roi if roi is not None else [0, 0, img_shape[1], img_shape[0]]
+    x0 = max(region[0] - LOCATION_CACHE_MARGIN, bounds[0])
+    y0 = max(region[1] - LOCATION_CACHE_MARGIN, bounds[1])
+    x1 = min(region[0] + region[2] + LOCATION_CACHE_MARGIN, bounds[0] + bounds[2])
+    y1 = min(region[1] + region[3] + LOCATION_CACHE_MARGIN, bounds[1] + bounds[3])
+    return [x0, y0, x1 - x0, y1 - y0]
+
+
 def _process_template_refs(ref: str | np.ndarray | list[str]) -> list[Template]:
     templates = []
     if not isinstance(ref, list):
@@ -123,41 +309,234 @@ def _process_template_refs(ref: str | np.ndarray | list[str]) -> list[Template]:
     return templates
 
 
+def _match_template(img: np.ndarray, template_img: np.ndarray, mask: np.ndarray | None) -> np.ndarray:
+    res = cv2.matchTemplate(img, template_img, cv2.TM_CCOEFF_NORMED, mask=mask)
+    np.nan_to_num(res, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    return res
+
+
+class _SearchImage:
+    """
+    ROI crop of a search input image together with its preprocessed variants (grayscale, color filtered, downscaled).
+    Each variant is computed once and shared by all templates of a search() call.
+    """
+
+    def __init__(
+        self, inp_img: np.ndarray, roi: list[float] | None = None, color_match: list[float] | None = None, origin: tuple[int, int] = (0, 0)
+    ):
+        """
+        :param origin: Position of inp_img in the window if only a region of it was grabbed. roi is in window coordinates then
+        """
+        if roi is None:
+            # if no roi is provided roi = full inp_img
+            roi = [origin[0], origin[1], inp_img.shape[1], inp_img.shape[0]]
+        self.roi = np.clip(np.array(roi), 0, None)
+        rx, ry, rw, rh = self.roi
+        ox, oy = origin
+        self.img = inp_img[ry - oy : ry - oy + rh, rx - ox : rx - ox + rw]
+        self._color_match = color_match
+        self._lock = threading.RLock()
+        self._variants = {}
+
+    @property
+    def is_empty(self) -> bool:
+        return self.img.shape[0] == 0 or self.img.shape[1] == 0
+
+    def get(self, use_grayscale: bool = False, pyramid_level: int = 0) -> np.ndarray:
+        """
+        :param use_grayscale: Return the grayscale variant. Ignored if the search filters by color
+        :param pyramid_level: Return the variant downscaled by 2**pyramid_level
+        """
+        key = (self._color_match is None and use_grayscale, pyramid_level)
+        with self._lock:
+            if key not in self._variants:
+                self._variants[key] = self._create_variant(*key)
+            return self._variants[key]
+
+    def _create_variant(self, use_grayscale: bool, pyramid_level: int) -> np.ndarray:
+        if pyramid_level > 0:
+            scale = 2**pyramid_level
+            return cv2.resize(self.get(use_grayscale), None, fx=1 / scale, fy=1 / scale, interpolation=cv2.INTER_AREA)
+        if self._color_match is not None:
+            return color_filter(self.img, self._color_match)[1]
+        if use_grayscale:
+            return cv2.cvtColor(self.img, cv2.COLOR_BGR2GRAY)
+        return self.img
+
+
+def _match_template_pyramid(
+    image: _SearchImage, use_grayscale: bool, template_img: np.ndarray, mask: np.ndarray | None, threshold: float, levels: int
+) -> np.ndarray:
+    """
+    Coarse-to-fine template matching. Image and template are matched at a downscaled level first, afterwards only small
+    windows around the coarse candidates are matched at full resolution.
+    :return: Result map of the full resolution search. Scores outside the refined windows are 0
+    """
+    img = image.get(use_grayscale)
+    while levels > 0 and min(template_img.shape[:2]) >> levels < PYRAMID_MIN_TEMPLATE_SIZE:
+        levels -= 1
+    if levels <= 0:
+        return _match_template(img, template_img, mask)
+
+    scale = 2**levels
+    coarse_img = image.get(use_grayscale, levels)
+    coarse_template = cv2.resize(template_img, None, fx=1 / scale, fy=1 / scale, interpolation=cv2.INTER_AREA)
+    coarse_mask = None
+    if mask is not None:
+        coarse_mask = cv2.resize(mask, coarse_template.shape[1::-1], interpolation=cv2.INTER_NEAREST)
+    if not (coarse_img.shape[0] > coarse_template.shape[0] and coarse_img.shape[1] > coarse_template.shape[1]):
+        return _match_template(img, template_img, mask)
+    coarse_res = _match_template(coarse_img, coarse_template, coarse_mask)
+    candidates = np.flatnonzero(coarse_res >= threshold - PYRAMID_THRESHOLD_MARGIN)
+    if len(candidates) > PYRAMID_MAX_CANDIDATE_RATIO * coarse_res.size:
+        return _match_template(img, template_img, mask)
+
+    res_height, res_width = img.shape[0] - template_img.shape[0] + 1, img.shape[1] - template_img.shape[1] + 1
+    res = np.zeros((res_height, res_width), dtype=np.float32)
+    if len(candidates) == 0:
+        return res
+    candidates_y, candidates_x = np.divmod(candidates, coarse_res.shape[1])
+
+    # mark candidates at full resolution and grow them to windows that cover the rounding error of the coarse level
+    candidate_mask = np.zeros((res_height, res_width), dtype=np.uint8)
+    candidate_mask[np.minimum(candidates_y * scale, res_height - 1), np.minimum(candidates_x * scale, res_width - 1)] = 255
+    radius = scale + 1
+    candidate_mask = cv2.dilate(candidate_mask, np.ones((2 * radius + 1, 2 * radius + 1), dtype=np.uint8))
+    num_labels, _, stats, _ = cv2.connectedComponentsWithStats(candidate_mask)
+    template_height, template_width = template_img.shape[:2]
+    for x, y, w, h, _ in stats[1:num_labels]:
+        window = img[y : y + h + template_height - 1, x : x + w + template_width - 1]
+        res[y : y + h, x : x + w] = _match_template(window, template_img, mask)
+    return res
+
+
+def _find_peaks(res: np.ndarray, threshold: float, template_width: int, template_height: int) -> list[tuple[int, int, float]]:
+    """
+    Non-maximum suppression of a template matching result map. Every position above threshold suppresses all weaker positions
+    in the region [-width / 2, width] x [-height / 2, height] around it.
+    :return: List of (x, y, score) sorted by score in descending order
+    """
+    # flatnonzero is considerably faster than nonzero on 2d arrays
+    candidates = np.flatnonzero(res >= threshold)
+    if len(candidates) == 0:
+        return []
+    ys, xs = np.divmod(candidates, res.shape[1])
+    scores = res.ravel()[candidates]
+    order = np.argsort(-scores, kind="stable")
+    xs, ys, scores = xs[order], ys[order], scores[order]
+    peaks = []
+    remaining = np.arange(len(scores))
+    while len(remaining) > 0:
+        best = remaining[0]
+        peaks.append((int(xs[best]), int(ys[best]), float(scores[best])))
+        dx = xs[remaining] - xs[best]
+        dy = ys[remaining] - ys[best]
+        is_suppressed = (dx >= -(template_width // 2)) & (dx <= template_width) & (dy >= -(template_height // 2)) & (dy <= template_height)
+        remaining = remaining[~is_suppressed]
+    return peaks
+
+
+def filter_close_matches(matches: list[TemplateMatch], max_distance: float) -> list[TemplateMatch]:
+    """
+    Removes matches whose center is within max_distance of a match with a higher score
+    :param matches: Template matches, e.g. of multiple templates that detect the same object
+    :param max_distance: Distance in pixels up to which two matches are considered to be the same object
+    :return: Remaining matches sorted by score in descending order
+    """
+    if not matches:
+        return []
+    matches = sorted(matches, key=lambda match: match.score, reverse=True)
+    centers = np.array([match.center for match in matches], dtype=float)
+    result = []
+    remaining = np.arange(len(matches))
+    while len(remaining) > 0:
+        best = remaining[0]
+        result.append(matches[best])
+        remaining = remaining[np.linalg.norm(centers[remaining] - centers[best], axis=1) > max_distance]
+    return result
+
+
 def _get_cv_result(
     template: Template,
-    inp_img: np.ndarray,
-    roi: list[float] | None = None,
+    image: _SearchImage,
     color_match: list[float] | None = None,
     use_grayscale: bool = False,
+    pyramid_levels: int = 0,
+    threshold: float = 0.68,
 ) -> list[np.ndarray]:
-    # crop image to roi
-    if roi is None:
-        # if no roi is provided roi = full inp_img
-        roi = [0, 0, inp_img.shape[1], inp_img.shape[0]]
-    roi = np.clip(np.array(roi), 0, None)
-    rx, ry, rw, rh = roi
-    img = inp_img[ry : ry + rh, rx : rx + rw]
-    if img.shape[0] == 0 or img.shape[1] == 0:
-        return None, template.img_bgr, roi
+    if image.is_empty:
+        return None, template.img_bgr, image.roi
 
     # filter for desired color or make grayscale
     if color_match:
         _, template_img = color_filter(template.img_bgr, color_match)
-        _, img = color_filter(img, color_match)
     elif use_grayscale:
         template_img = template.img_gray
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     else:
         template_img = template.img_bgr
-    if not (img.shape[0] > template_img.shape[0] and img.shape[1] > template_img.shape[1]):
+    img = image.get(use_grayscale)
+    width, height = template.size
+    x, y = template.offset
+    if not (img.shape[0] > height and img.shape[1] > width):
         # LOGGER.error(
         #     f"Image shape and template shape are incompatible: {template.name}. Image: {img.shape}, Template: {template_img.shape}, roi: {roi}"
         # )
         res = None
+    elif pyramid_levels > 0:
+        res = _match_template_pyramid(image, use_grayscale, template_img, template.alpha_mask, threshold, pyramid_levels)
+        res = res[y : y + img.shape[0] - height + 1, x : x + img.shape[1] - width + 1]
     else:
-        res = cv2.matchTemplate(img, template_img, cv2.TM_CCOEFF_NORMED, mask=template.alpha_mask)
-        np.nan_to_num(res, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
-    return res, template_img, roi
+        # templates are cropped to their opaque area, only match them where the whole template asset fits into the image
+        img = img[y : y + img.shape[0] - height + template_img.shape[0], x : x + img.shape[1] - width + template_img.shape[1]]
+        res = _match_template(img, template_img, template.alpha_mask)
+    return res, template_img, image.roi
+
+
+def _evaluate_templates(
+    templates: list[Template], evaluate: Callable[[Template], list[TemplateMatch]], mode: str, do_multi_process: bool
+) -> tuple[list[TemplateMatch], int]:
+    """
+    Runs evaluate for all templates. In mode "first" the matches of the first template in list order that has any are returned
+    and templates after it are skipped. With do_multi_process all templates are submitted to the thread pool at once and
+    results are collected as they complete.
+    :return: Matches and the number of templates that were actually evaluated
+    """
+    if not do_multi_process or len(templates) <= 1:
+        matches = []
+        for evaluated, template in enumerate(templates, start=1):
+            matches += evaluate(template)
+            if mode == "first" and matches:
+                return matches, evaluated
+        return matches, len(templates)
+
+    first_match_idx = len(templates)
+
+    def _evaluate(idx: int, template: Template) -> list[TemplateMatch] | None:
+        # a template earlier in the list already matched, no need to evaluate this one
+        if mode == "first" and first_match_idx < idx:
+            return None
+        return evaluate(template)
+
+    futures = {TP.submit(_evaluate, idx, template): idx for idx, template in enumerate(templates)}
+    results: dict[int, list[TemplateMatch] | None] = {}
+    for future in concurrent.futures.as_completed(futures):
+        if future.cancelled():
+            continue
+        idx = futures[future]
+        results[idx] = future.result()
+        if mode == "first" and results[idx]:
+            first_match_idx = min(first_match_idx, idx)
+            for other_future, other_idx in futures.items():
+                if other_idx > first_match_idx:
+                    other_future.cancel()
+            # only templates before the first match can still change the result
+            if all(i in results for i in range(first_match_idx)):
+                break
+
+    evaluated = sum(1 for res in results.values() if res is not None)
+    if mode == "first":
+        return (results[first_match_idx] if first_match_idx < len(templates) else []), evaluated
+    return [match for idx in sorted(results) for match in results[idx]], evaluated
 
 
 def search(
@@ -171,6 +550,8 @@ def search(
     timeout: int = 0,
     suppress_debug: bool = True,
     do_multi_process: bool = True,
+    pyramid_levels: int = 0,
+    use_location_cache: bool = False,
 ) -> SearchResult:
     """
     Search for templates in an image
@@ -183,19 +564,39 @@ def search(
     :param mode: search "first" match or "all" matches
     :param timeout: wait for the specified number of seconds before stopping search
     :param do_multi_process: flag if multi process should be used in case there are multiple refs
-    :return: SearchResult object containing success and matches
+    :param pyramid_levels: Number of 2x downscale levels used to find candidates before matching them at full resolution. 0 disables it
+    :param use_location_cache: Search around the locations where the templates were last found before searching the full roi.
+        Only used in mode "first"
+    :return: SearchResult object containing success and matches. Searches on the current frame of Cam without timeout are
+        cached until the next frame is grabbed
     """
 
-    templates = _process_template_refs(ref)
-    result = SearchResult()
-    matches = []
-    future_list = []
+    frame_key = None
+    if inp_img is None and timeout == 0:
+        frame_key = _frame_cache_key(ref, roi, color_match, threshold, use_grayscale, mode, pyramid_levels)
     if isinstance(roi, str):
         try:
             roi = getattr(ResManager().roi, roi)
         except KeyError as e:
             LOGGER.error(f"Invalid roi key: {roi}")
             LOGGER.error(e)
+
+    def _grab() -> tuple[np.ndarray, tuple[int, int], int]:
+        # only grab the roi, the image keeps its position in the window as origin
+        if roi is None:
+            img, frame_id = Cam().grab_frame()
+            return img, (0, 0), frame_id
+        img, frame_id = Cam().grab_frame(roi=roi)
+        return img, tuple(Cam().clip_to_window(roi)[:2]), frame_id
+
+    grabbed = _grab() if frame_key is not None else None
+    frame_id = grabbed[2] if grabbed is not None else None
+    if frame_id is not None and (cached_result := FRAME_RESULTS.get(frame_id, frame_key)) is not None:
+        return cached_result
+
+    templates = _process_template_refs(ref)
+    result = SearchResult()
+    matches = []
     if isinstance(color_match, str):
         try:
             color_match = getattr(COLORS, color_match)
@@ -203,76 +604,89 @@ def search(
             LOGGER.error(f"Invalid color_match key: {color_match}")
             LOGGER.error(e)
 
-    def _process_cv_result(template: Template, img: np.ndarray) -> bool:
-        new_match = False
-        res, template_img, new_roi = _get_cv_result(template, img, roi, color_match, use_grayscale)
+    def _process_cv_result(template: Template, image: _SearchImage) -> list[TemplateMatch]:
+        res, _, new_roi = _get_cv_result(template, image, color_match, use_grayscale, pyramid_levels, threshold)
+        if res is None:
+            return []
+        rec_w, rec_h = template.size
 
-        # i = 0
-        while True and not (matches and mode == "first") and res is not None:
+        if mode == "first":
             _, max_val, _, max_pos = cv2.minMaxLoc(res)
-
-            if max_val >= threshold:
-                new_match = True
-                # Save rectangle corresponding to the matched region
-                rec_x = int(max_pos[0] + new_roi[0])
-                rec_y = int(max_pos[1] + new_roi[1])
-                rec_w = int(template_img.shape[1])
-                rec_h = int(template_img.shape[0])
-
-                template_match = TemplateMatch()
-                template_match.region = [rec_x, rec_y, rec_w, rec_h]
-                template_match.region_monitor = [*Cam().window_to_monitor((rec_x, rec_y)), rec_w, rec_h]
-                template_match.center = get_center(template_match.region)
-                template_match.center_monitor = Cam().window_to_monitor(template_match.center)
-                template_match.name = template.name
-                template_match.score = max_val
-
-                matches.append(template_match)
-                if mode == "first":
-                    break
-                # Remove the matched region from the result
-                cv2.rectangle(
-                    res,
-                    (max_pos[0] - template_img.shape[1] // 2, max_pos[1] - template_img.shape[0] // 2),
-                    (max_pos[0] + template_img.shape[1], max_pos[1] + template_img.shape[0]),
-                    (0, 0, 0),
-                    -1,
-                )
-                # result_norm = cv2.normalize(res, None, alpha=0, beta=255, norm_type=cv2.NORM_MINMAX, dtype=cv2.CV_8U)
-                # cv2.imwrite(f"res{i}.png", result_norm)
-                # i += 1
-            else:
-                break
-        return new_match
-
+            peaks = [(*max_pos, max_val)] if max_val >= threshold else []
+        else:
+            peaks = _find_peaks(res, threshold, rec_w, rec_h)
+        template_matches = []
+        for x, y, score in peaks:
+            # Save rectangle corresponding to the matched region
+            rec_x = int(x + new_roi[0])
+            rec_y = int(y + new_roi[1])
+
+            template_match = TemplateMatch()
+            template_match.region = [rec_x, rec_y, rec_w, rec_h]
+            template_match.region_monitor = [*Cam().window_to_monitor((rec_x, rec_y)), rec_w, rec_h]
+            template_match.center = get_center(template_match.region)
+            template_match.center_monitor = Cam().window_to_monitor(template_match.center)
+            template_match.name = template.name
+            template_match.score = score
+            template_matches.append(template_match)
+        return template_matches
+
+    def _evaluate_template(template: Template, image: _SearchImage) -> list[TemplateMatch]:
+        start = time.perf_counter()
+        template_matches = _process_cv_result(template, image)
+        TEMPLATE_STATS.record(
+            template.name or "unnamed", time.perf_counter() - start, image.img.shape[0] * image.img.shape[1], bool(template_matches)
+        )
+        return template_matches
+
+    def _search_cached_locations(img: np.ndarray, origin: tuple[int, int]) -> tuple[list[TemplateMatch], int]:
+        evaluated = 0
+        for template in templates:
+            if template.name is None or (region := LOCATION_CACHE.get(template.name, roi)) is None:
+                continue
+            evaluated += 1
+            window = _location_window(region, roi, img.shape)
+            if template_matches := _evaluate_template(template, _SearchImage(img, window, color_match, origin)):
+                return template_matches, evaluated
+        return [], evaluated
+
+    use_location_cache = use_location_cache and mode == "first"
     start = time.time()
     time_remains = True
     while time_remains and not matches:
-        img = Cam().grab() if inp_img is None else inp_img
-        if do_multi_process:
-            for template in templates:
-                future = TP.submit(_process_cv_result, template, img)
-                future_list.append(future)
-
-                for i in future_list:
-                    _ = i.result()
+        if inp_img is not None:
+            img, origin = inp_img, (0, 0)
         else:
-            for template in templates:
-                res = _process_cv_result(template, img)
-                if mode == "first" and res:
-                    break
-
+            img, origin, _ = grabbed if grabbed is not None else _grab()
+            grabbed = None
+        if use_location_cache:
+            matches, evaluated = _search_cached_locations(img, origin)
+            result.evaluated_templates += evaluated
+            LOCATION_CACHE.record(hit=bool(matches))
+        if not matches:
+            image = _SearchImage(img, roi, color_match, origin)
+            matches, evaluated = _evaluate_templates(
+                templates, lambda template, image=image: _evaluate_template(template, image), mode, do_multi_process
+            )
+            result.evaluated_templates += evaluated
         time_remains = time.time() - start < timeout
 
+    if use_location_cache:
+        for template_match in matches:
+            if template_match.name is not None:
+                LOCATION_CACHE.update(template_match.name, roi, template_match.region)
+
     if matches:
         result.success = True
         result.matches = sorted(matches, key=lambda obj: obj.score, reverse=True)
         if not suppress_debug and len(matches) > 1 and mode == "all":
             LOGGER.debug(
                 "Found the following matches:\n"
-                + ", ".join([f"  {template_match.name} ({template_match.score*100:.1f}% confidence)" for template_match in matches])
+                + ", ".join([f"  {template_match.name} ({template_match.score * 100:.1f}% confidence)" for template_match in matches])
             )
     elif not suppress_debug:
         LOGGER.debug(f"Could not find desired templates: {ref}")
 
+    if frame_key is not None:
+        FRAME_RESULTS.put(frame_id, frame_key, result)
     return result
@@ -0,0 +1,55 @@
+# generate the vocabulary and character whitelist of the OCR from the language data
+import re
+from pathlib import Path
+
+from src.config import AFFIX_COMPARISON_CHARS, BASE_DIR
+from src.config.loader import IniConfigLoader
+from src.dataloader import Dataloader
+from src.item.data.item_type import ItemType
+from src.utils.ocr.read import USER_WORDS_FILE, WHITELIST_FILE
+
+# characters of numbers, value ranges and other text that is not part of the language data, e.g. "+1,591 [1,276 - 1,746]".
+# the space has to be whitelisted as well, otherwise tesseract joins the words
+EXTRA_CHARS = "0123456789+-%[]().,:'/ "
+
+
+def _phrases() -> list[str]:
+    """All texts of the language data that the OCR reads"""
+    dataloader = Dataloader()
+    # descriptions of uniques are cut after AFFIX_COMPARISON_CHARS, so their last word can be incomplete
+    uniques = [desc.rsplit(" ", 1)[0] if len(desc) >= AFFIX_COMPARISON_CHARS else desc for desc in dataloader.aspect_unique_dict.values()]
+    return [
+        *dataloader.affix_dict.values(),
+        *dataloader.affix_sigil_dict.values(),
+        *uniques,
+        *[key.replace("_", " ") for key in dataloader.aspect_unique_dict],
+        *[str(item_type.value) for item_type in ItemType],
+        *dataloader.tooltips.values(),
+        *dataloader.error_map.values(),
+        *dataloader.filter_after_keyword,
+        *dataloader.filter_words,
+    ]
+
+
+def user_words(phrases: list[str]) -> list[str]:
+    """Words of the phrases as they are shown in game, lower case and capitalized for headers and item types"""
+    words = {word for phrase in phrases for word in re.findall(r"[a-z]+(?:'[a-z]+)?", phrase.lower()) if len(word) > 1}
+    return sorted(words | {word.capitalize() for word in words})
+
+
+def char_whitelist(phrases: list[str]) -> str:
+    """Characters of the phrases in both cases and of numbers"""
+    chars = {char for phrase in phrases for char in phrase.lower() + phrase.upper()} | set(EXTRA_CHARS)
+    return "".join(sorted(char for char in chars if char.isprintable()))
+
+
+def main(lang_dir: Path):
+    phrases = _phrases()
+    words = user_words(phrases)
+    (lang_dir / USER_WORDS_FILE).write_text("\n".join(words) + "\n", encoding="utf-8")
+    (lang_dir / WHITELIST_FILE).write_text(char_whitelist(phrases) + "\n", encoding="utf-8")
+    print(f"Wrote {len(words)} words to {lang_dir / USER_WORDS_FILE}")
+
+
+if __name__ == "__main__":
+    main(BASE_DIR / f"assets/lang/{IniConfigLoader().general.language}")
@@ -9,7 +9,11 @@ class CharInventory(InventoryBase):
         super().__init__()
         self.menu_name = "Char_Inventory"
         self.is_open_search_args: SearchArgs = SearchArgs(
-            ref=["sort_icon", "sort_icon_hover"], threshold=0.8, roi=ResManager().roi.sort_icon, use_grayscale=False
+            ref=["sort_icon", "sort_icon_hover"],
+            threshold=0.8,
+            roi=ResManager().roi.sort_icon,
+            use_grayscale=False,
+            use_location_cache=True,
         )
         self.open_hotkey = IniConfigLoader().char.inventory
         self.delay = 1  # Needed as they added a "fad-in" for the items
@@ -15,7 +15,11 @@ class Chest(InventoryBase):
         super().__init__(5, 10, is_stash=True)
         self.menu_name = "Chest"
         self.is_open_search_args = SearchArgs(
-            ref=["stash_menu_icon", "stash_menu_icon_medium"], threshold=0.8, roi="stash_menu_icon", use_grayscale=True
+            ref=["stash_menu_icon", "stash_menu_icon_medium"],
+            threshold=0.8,
+            roi="stash_menu_icon",
+            use_grayscale=True,
+            use_location_cache=True,
         )
         self.curr_tab = 0
 
@@ -47,20 +47,22 @@ class InventoryBase(Menu):
         :param roi: The rectangle to consider, represented as (x_min, y_min, width, height).
         :param rows: The number of rows in the grid.
         :param columns: The number of columns in the grid.
-        :param img: An optional image (as a numpy array) to use for identifying empty slots.
+        :param img: An optional image (as a numpy array) to use for identifying empty slots. If None, only the slots are grabbed.
         :return: Four sets of coordinates.
             - Centers of the occupied slots
             - Centers of the empty slots
         """
+        origin = (0, 0)
         if img is None:
-            img = Cam().grab()
+            img = Cam().grab(roi=self.slots_roi)
+            origin = Cam().clip_to_window(self.slots_roi)[:2]
         grid = to_grid(self.slots_roi, self.rows, self.columns)
         occupied_slots = []
         empty_slots = []
 
         for _, slot_roi in enumerate(grid):
             item_slot = ItemSlot(bounding_box=slot_roi, center=get_center(slot_roi))
-            slot_img = crop(img, slot_roi)
+            slot_img = crop(img, (slot_roi[0] - origin[0], slot_roi[1] - origin[1], slot_roi[2], slot_roi[3]))
 
             hsv_img = cv2.cvtColor(slot_img, cv2.COLOR_BGR2HSV)
             mean_value_overall = np.mean(hsv_img[:, :, 2])
@@ -232,3 +232,49 @@ def compare_histograms(imageA, imageB):
 
     # Compute correlation between histograms
     return cv2.compareHist(histA, histB, cv2.HISTCMP_CORREL)
+
+
+class FrameChangeDetector:
+    """
+    Tells whether a frame differs from the last frame that was processed, so that work on unchanged frames can be skipped.
+    Frames are compared by a signature of every step-th pixel.
+    :param step: Distance between the sampled pixels
+    :param pixel_threshold: Minimal difference of a sampled pixel in any channel to count it as changed
+    :param changed_ratio: Ratio of changed sampled pixels above which the frame changed. Small animations stay below.
+    """
+
+    def __init__(self, step: int = 4, pixel_threshold: int = 12, changed_ratio: float = 0.01):
+        self.step = step
+        self.pixel_threshold = pixel_threshold
+        self.changed_ratio = changed_ratio
+        self.processed = 0
+        self.skipped = 0
+        self._signature: np.ndarray | None = None
+        self._key = None
+
+    def has_changed(self, img: np.ndarray, key=None) -> bool:
+        """
+        :param img: The frame or the region of it that is processed
+        :param key: Identifies what is processed, e.g. the region. A frame with a different key always counts as changed.
+        :return: True if the frame has to be processed, it is the reference for the next frames then
+        """
+        signature = img[:: self.step, :: self.step].astype(np.int16)
+        changed = self._signature is None or key != self._key or signature.shape != self._signature.shape
+        if not changed:
+            diff = np.abs(signature - self._signature)
+            if diff.ndim == 3:
+                diff = diff.max(axis=2)
+            changed = np.count_nonzero(diff >= self.pixel_threshold) > self.changed_ratio * diff.size
+        if changed:
+            self._signature, self._key = signature, key
+            self.processed += 1
+        else:
+            self.skipped += 1
+        return changed
+
+    def reset(self):
+        """The next frame is processed in any case, e.g. if processing the last one did not come to a result"""
+        self._signature = None
+
+    def __str__(self) -> str:
+        return f"{self.processed} frames processed, {self.skipped} unchanged frames skipped"
@@ -1,56 +1,231 @@
+import dataclasses
+import hashlib
+import itertools
 import logging
+import queue
 import threading
-import uuid
+import time
+from collections import OrderedDict
+from collections.abc import Generator
+from contextlib import contextmanager, suppress
 
 import cv2
 import numpy as np
-from tesserocr import OEM, RIL, PyTessBaseAPI
+from tesserocr import OEM, PSM, RIL, PyTessBaseAPI
 
 from src.config import BASE_DIR
 from src.config.data import COLORS
 from src.config.helper import singleton
 from src.config.loader import IniConfigLoader
+from src.config.ui import ResManager
 from src.utils.image_operations import color_filter
 from src.utils.ocr.models import OcrResult
 
 LOGGER = logging.getLogger(__name__)
 
+USER_WORDS_FILE = "ocr_user_words.txt"
+WHITELIST_FILE = "ocr_whitelist.txt"
+
+# image that an API of the pool holds, set by an OcrSession. APIs are only used by one thread at a time, see APIPool.api()
+_api_images: dict[int, int] = {}
+_session_ids = itertools.count()
+
 
 @singleton
-class _APILoader:
+class APIPool:
+    """
+    Bounded pool of Tesseract APIs. Borrowing blocks while all APIs are in use. APIs are created on demand up to the size of the
+    pool, warm_up() creates them in the background so that the first reads do not pay for loading the model.
+    """
+
     tessdata_path = BASE_DIR / "assets/tessdata"
 
     def __init__(self):
-        self._apis = []
+        self.size = IniConfigLoader().advanced_options.ocr_pool_size
+        self._idle: queue.LifoQueue[PyTessBaseAPI] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._borrows = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._busy_time = 0.0
+        self._start_time = time.perf_counter()
+
+    def _create_api(self) -> PyTessBaseAPI:
+        language = IniConfigLoader().general.language
+        lang_dir = BASE_DIR / f"assets/lang/{language}"
+        # vocabulary and characters of the language data, see src/tools/gen_ocr_data.py
+        variables = {}
+        if (user_words := lang_dir / USER_WORDS_FILE).exists():
+            variables["user_words_file"] = str(user_words)
+        if (whitelist := lang_dir / WHITELIST_FILE).exists():
+            variables["tessedit_char_whitelist"] = whitelist.read_text(encoding="utf-8").rstrip("\n")
+        api = PyTessBaseAPI(psm=PSM.AUTO, oem=OEM.LSTM_ONLY, path=str(self.tessdata_path), lang=language, variables=variables)
+        api.SetVariable("debug_file", "/dev/null")
+        return api
+
+    def _reserve_creation(self) -> bool:
+        with self._lock:
+            if self._created >= self.size:
+                return False
+            self._created += 1
+            return True
+
+    def _create_reserved_api(self) -> PyTessBaseAPI:
+        """Creates an API after _reserve_creation(), the reservation is given back if the creation fails"""
+        try:
+            return self._create_api()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def warm_up(self):
+        """Creates all APIs of the pool on a background thread"""
+
+        def _fill():
+            while self._reserve_creation():
+                self._idle.put(self._create_reserved_api())
+            LOGGER.debug(f"Created {self.size} Tesseract APIs")
+
+        threading.Thread(target=_fill, name="APIPoolWarmUp", daemon=True).start()
+
+    @contextmanager
+    def api(self) -> Generator[PyTessBaseAPI, None, None]:
+        """Borrows an API and returns it to the pool afterwards, no matter how the block is left"""
+        start = time.perf_counter()
+        try:
+            api = self._idle.get_nowait()
+        except queue.Empty:
+            api = None
+        while api is None:
+            if self._reserve_creation():
+                api = self._create_reserved_api()
+            else:
+                # all APIs are in use or being created, a creation that fails frees its place in the pool
+                with suppress(queue.Empty):
+                    api = self._idle.get(timeout=0.1)
+        borrowed = time.perf_counter()
+        with self._lock:
+            self._borrows += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._wait_time += borrowed - start
+            self._max_wait_time = max(self._max_wait_time, borrowed - start)
+        try:
+            yield api
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self._busy_time += time.perf_counter() - borrowed
+            self._idle.put(api)
+
+    def stats(self) -> dict[str, float]:
+        """Usage of the pool, utilization is the share of time the APIs were in use since the pool was created"""
+        with self._lock:
+            elapsed = time.perf_counter() - self._start_time
+            return {
+                "size": self.size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "borrows": self._borrows,
+                "mean_wait_ms": self._wait_time / self._borrows * 1000 if self._borrows else 0.0,
+                "max_wait_ms": self._max_wait_time * 1000,
+                "utilization": self._busy_time / (elapsed * self.size) if elapsed > 0 else 0.0,
+            }
+
+    def log_stats(self):
+        stats = self.stats()
+        LOGGER.debug(
+            f"Tesseract API pool: {stats['borrows']} reads, peak {stats['peak_in_use']}/{stats['size']} APIs in use, "
+            f"wait mean {stats['mean_wait_ms']:.1f}ms max {stats['max_wait_ms']:.1f}ms, utilization {stats['utilization']:.1%}"
+        )
+
+
+class OcrCache:
+    """
+    LRU cache of OCR results. Crops are keyed by a hash of their content, so only identical crops hit, e.g. when the same item is
+    read again.
+    :param max_size: Number of results that are kept
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._results: OrderedDict[tuple, tuple[OcrResult, list | None]] = OrderedDict()
         self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
-    def get_api(self, user: uuid.UUID) -> PyTessBaseAPI:
+    @staticmethod
+    def key(img: np.ndarray, *flags: bool) -> tuple:
+        digest = hashlib.blake2b(np.ascontiguousarray(img).data, digest_size=16).digest()
+        return digest, img.shape, img.dtype.str, *flags
+
+    def get(self, key: tuple) -> tuple[OcrResult, list | None] | None:
         with self._lock:
-            for api in self._apis:
-                if not api["user"]:
-                    api["user"] = user
-                    return api["api"]
-            new_api = PyTessBaseAPI(psm=3, oem=OEM.LSTM_ONLY, path=str(self.tessdata_path), lang=IniConfigLoader().general.language)
-            new_api.SetVariable("debug_file", "/dev/null")
-            self._apis.append({"api": new_api, "user": user})
-            return new_api
-
-    def release_api(self, user: uuid.UUID) -> None:
+            if (entry := self._results.get(key)) is None:
+                self.misses += 1
+                return None
+            self._results.move_to_end(key)
+            self.hits += 1
+        res, line_boxes = entry
+        return _copy_result(res), None if line_boxes is None else list(line_boxes)
+
+    def put(self, key: tuple, res: OcrResult, line_boxes: list | None = None):
         with self._lock:
-            for api in self._apis:
-                if api["user"] == user:
-                    api["user"] = ""
-                    return
-        LOGGER.warning(f"API for {user} not found!")
+            self._results[key] = (_copy_result(res), None if line_boxes is None else list(line_boxes))
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+                self.evictions += 1
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def log_stats(self):
+        LOGGER.debug(f"OCR cache: {self.hits} hits, {self.misses} misses ({self.hit_rate:.1%} hit rate), {self.evictions} evictions")
+
 
+OCR_CACHE = OcrCache()
 
-def image_to_text(img: np.ndarray, line_boxes: bool = False, do_pre_proc: bool = True) -> OcrResult | tuple[OcrResult, list[int]]:
-    my_id = uuid.uuid4()
-    api = _APILoader().get_api(my_id)
+
+def _copy_result(res: OcrResult) -> OcrResult:
+    word_confidences = list(res.word_confidences) if isinstance(res.word_confidences, list) else res.word_confidences
+    return dataclasses.replace(res, word_confidences=word_confidences)
+
+
+def image_to_text(
+    img: np.ndarray, line_boxes: bool = False, do_pre_proc: bool = True, psm: PSM = PSM.AUTO
+) -> OcrResult | tuple[OcrResult, list[int]]:
+    """
+    Reads the text of an image
+    :param img: BGR image
+    :param line_boxes: Also return the images and boxes of the text lines
+    :param do_pre_proc: Enhance the text before reading it
+    :param psm: Page segmentation mode, e.g. PSM.SINGLE_BLOCK if the image only contains a single paragraph
+    :return: Result of the OCR and the text lines if line_boxes is True
+    """
     if img is None or len(img) == 0:
         LOGGER.warning("img provided to image_to_text() is empty!")
-        return OcrResult("", "", word_confidences=0, mean_confidence=0), [] if line_boxes else ""
+        res = OcrResult("", "", word_confidences=0, mean_confidence=0)
+        return (res, []) if line_boxes else res
+
+    scale = ocr_scale()
+    cache_key = OCR_CACHE.key(img, line_boxes, do_pre_proc, psm, scale)
+    if (cached := OCR_CACHE.get(cache_key)) is not None:
+        return cached if line_boxes else cached[0]
 
+    img = _rescale(img, scale)
     # Apply a border to the image. This weird hack prevents the "Error in boxClipToRectangle" errors.
     # Read more here: https://github.com/tesseract-ocr/tesseract/issues/427#issuecomment-248153491
     border_size = 10
@@ -65,15 +240,109 @@ def image_to_text(img: np.ndarray, line_boxes: bool = False, do_pre_proc: bool =
     )
     if do_pre_proc:
         final_img = _pre_proc_img(img)
-    api.SetImageBytes(*_img_to_bytes(final_img))
-    text = api.GetUTF8Text().strip()
-    res = OcrResult(original_text=text, text=text, word_confidences=api.AllWordConfidences(), mean_confidence=api.MeanTextConf())
-    if line_boxes:
-        line_boxes_res = api.GetComponentImages(RIL.TEXTLINE, True)
-        _APILoader().release_api(my_id)
-        return res, line_boxes_res
-    _APILoader().release_api(my_id)
-    return res
+    with APIPool().api() as api:
+        api.SetPageSegMode(psm)
+        api.SetImageBytes(*_img_to_bytes(final_img))
+        _api_images.pop(id(api), None)
+        text = api.GetUTF8Text().strip()
+        res = OcrResult(original_text=text, text=text, word_confidences=api.AllWordConfidences(), mean_confidence=api.MeanTextConf())
+        line_boxes_res = api.GetComponentImages(RIL.TEXTLINE, True) if line_boxes else None
+    if line_boxes_res is not None:
+        line_boxes_res = _unscale_boxes(line_boxes_res, scale, 0 if do_pre_proc else border_size)
+    OCR_CACHE.put(cache_key, res, line_boxes_res)
+    return (res, line_boxes_res) if line_boxes else res
+
+
+class OcrSession:
+    """
+    Reads several regions of one image, e.g. of an item description. The image is preprocessed once and only set once on each API
+    of the pool, the regions are then selected with SetRectangle. Regions can be read concurrently.
+    Regions that are read without preprocessing are cropped and read with image_to_text() as tesseract misses text at the edges
+    of a rectangle unless it is surrounded by the black border that image_to_text() adds.
+    :param img: BGR image
+    """
+
+    def __init__(self, img: np.ndarray):
+        self.img = img
+        self._id = next(_session_ids)
+        self._scale = ocr_scale()
+        self._image = None
+        self._lock = threading.Lock()
+
+    def _pre_proc_image(self) -> tuple:
+        with self._lock:
+            if self._image is None:
+                self._image = _img_to_bytes(_pre_proc_img(_rescale(self.img, self._scale)))
+            return self._image
+
+    def read(
+        self, roi: tuple[int, int, int, int], line_boxes: bool = False, do_pre_proc: bool = True, psm: PSM = PSM.AUTO
+    ) -> OcrResult | tuple[OcrResult, list[int]]:
+        """
+        Reads the text of a region of the image, see image_to_text()
+        :param roi: Region in the format (x, y, w, h). Like with crop(), the whole image is read if it is not within the image
+        :return: Result of the OCR and the text lines if line_boxes is True, the boxes are relative to the region
+        """
+        height, width = self.img.shape[:2]
+        x, y, w, h = (int(val) for val in roi)
+        if x < 0 or y < 0 or x + w > width or y + h > height:
+            x, y, w, h = 0, 0, width, height
+        region = self.img[y : y + h, x : x + w]
+        if not do_pre_proc or region.size == 0:
+            return image_to_text(region, line_boxes=line_boxes, do_pre_proc=do_pre_proc, psm=psm)
+
+        cache_key = OCR_CACHE.key(region, line_boxes, do_pre_proc, psm, self._scale, True)
+        if (cached := OCR_CACHE.get(cache_key)) is not None:
+            return cached if line_boxes else cached[0]
+
+        image = self._pre_proc_image()
+        scaled_height, scaled_width = image[2], image[1]
+        left, top = min(round(x * self._scale), scaled_width - 1), min(round(y * self._scale), scaled_height - 1)
+        right, bottom = min(round((x + w) * self._scale), scaled_width), min(round((y + h) * self._scale), scaled_height)
+        with APIPool().api() as api:
+            if _api_images.get(id(api)) != self._id:
+                api.SetImageBytes(*image)
+                _api_images[id(api)] = self._id
+            api.SetPageSegMode(psm)
+            api.SetRectangle(left, top, max(right - left, 1), max(bottom - top, 1))
+            text = api.GetUTF8Text().strip()
+            res = OcrResult(original_text=text, text=text, word_confidences=api.AllWordConfidences(), mean_confidence=api.MeanTextConf())
+            # tesseract returns the boxes relative to the rectangle
+            line_boxes_res = _unscale_boxes(api.GetComponentImages(RIL.TEXTLINE, True), self._scale) if line_boxes else None
+        OCR_CACHE.put(cache_key, res, line_boxes_res)
+        return (res, line_boxes_res) if line_boxes else res
+
+
+def ocr_scale() -> float:
+    """Scale of the images for the OCR. Text of high resolutions is shrunk to advanced_options.ocr_line_height, it is never enlarged"""
+    target_line_height = IniConfigLoader().advanced_options.ocr_line_height
+    line_height = ResManager().offsets.item_descr_line_height
+    return min(1.0, target_line_height / line_height) if target_line_height > 0 and line_height > 0 else 1.0
+
+
+def _rescale(img: np.ndarray, scale: float) -> np.ndarray:
+    if scale == 1.0:
+        return img
+    return cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def _unscale_boxes(line_boxes: list, scale: float, border_size: int = 0) -> list:
+    """Maps the boxes of text lines that were read from a rescaled image with a border back to the original image with the border"""
+    if scale == 1.0:
+        return line_boxes
+    return [
+        (
+            line_img,
+            {
+                "x": round((box["x"] - border_size) / scale) + border_size,
+                "y": round((box["y"] - border_size) / scale) + border_size,
+                "w": round(box["w"] / scale),
+                "h": round(box["h"] / scale),
+            },
+            *ids,
+        )
+        for line_img, box, *ids in line_boxes
+    ]
 
 
 def _img_to_bytes(image: np.ndarray, colorspace: str = "BGR"):
@@ -96,25 +365,28 @@ def _img_to_bytes(image: np.ndarray, colorspace: str = "BGR"):
     return image.tobytes(), width, height, bytes_per_pixel, bytes_per_line
 
 
-def _pre_proc_img(input_img: np.ndarray) -> np.ndarray:
-    img = input_img.copy()
-    masked_red, _ = color_filter(img, COLORS.unusable_red, False)
-    contours, _ = cv2.findContours(masked_red, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-    for contour in contours:
-        x, y, w, h = cv2.boundingRect(contour)
-        cv2.rectangle(img, (x, y), (x + w, y + h), (0, 0, 0), -1)
-
-    # Convert the image to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-    gamma = 1.8
-    gamma_corrected = np.power(gray / 255.0, gamma) * 255.0
-    gamma_corrected = gamma_corrected.astype(np.uint8)
+# gamma correction of _pre_proc_img() for all gray values, the same as computing it per pixel
+_GAMMA = 1.8
+_GAMMA_LUT = (np.power(np.arange(256) / 255.0, _GAMMA) * 255.0).astype(np.uint8)
+_MORPH_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
 
-    # Apply Gaussian blur to reduce noise and smoothen the image
-    blurred = gamma_corrected  # cv2.GaussianBlur(gamma_corrected, (3, 3), 0)
 
+def _pre_proc_img(input_img: np.ndarray) -> np.ndarray:
+    """
+    Enhances the text of an image for the OCR. Red text, e.g. of unusable items, is blacked out, the image is converted to grayscale,
+    gamma corrected and small gaps in the letters are closed.
+    :param input_img: BGR image
+    :return: Grayscale image
+    """
+    red, _ = color_filter(input_img, COLORS.unusable_red, False)
+    gray = cv2.cvtColor(input_img, cv2.COLOR_BGR2GRAY)
+    if cv2.countNonZero(red):
+        # the areas of inner contours are part of the area of their outer contour, so only the outer ones have to be blacked out
+        contours, _ = cv2.findContours(red, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            cv2.rectangle(gray, (x, y), (x + w, y + h), 0, -1)
+    cv2.LUT(gray, _GAMMA_LUT, dst=gray)
     # Perform morphological operations to further enhance text regions
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-    dilated = cv2.dilate(blurred, kernel, iterations=1)
-    return cv2.erode(dilated, kernel, iterations=1)
+    dilated = cv2.dilate(gray, _MORPH_KERNEL, iterations=1)
+    return cv2.erode(dilated, _MORPH_KERNEL, iterations=1)
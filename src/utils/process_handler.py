@@ -1,11 +1,15 @@
+import atexit
 import ctypes
 import logging
 import os
-
-from src.utils.window import get_window_spec_id
+import threading
+from collections.abc import Callable
 
 LOGGER = logging.getLogger(__name__)
 
+_shutdown_hooks: list[Callable[[], None]] = []
+_shutdown_lock = threading.Lock()
+
 
 def kill_thread(thread):
     thread_id = thread.ident
@@ -15,12 +19,38 @@ def kill_thread(thread):
         LOGGER.error("Exception raise failure")
 
 
+def register_shutdown_hook(hook: Callable[[], None]):
+    """Registers a function that runs once when d4lf shuts down, either by safe_exit or when the interpreter exits"""
+    with _shutdown_lock:
+        _shutdown_hooks.append(hook)
+
+
+def run_shutdown_hooks():
+    """Runs the registered hooks in reverse order of registration. Each hook only runs once, even if this is called again."""
+    with _shutdown_lock:
+        hooks = _shutdown_hooks[::-1]
+        _shutdown_hooks.clear()
+    for hook in hooks:
+        try:
+            hook()
+        except Exception:
+            LOGGER.exception(f"Shutdown hook {hook} failed")
+
+
+atexit.register(run_shutdown_hooks)
+
+
 def safe_exit(error_code=0):
     LOGGER.info("Shutting down")
+    # os._exit skips exit handlers
+    run_shutdown_hooks()
     os._exit(error_code)
 
 
 def set_process_name(name, window_spec):
+    # the window functions need Windows, the rest of this module is also used elsewhere, e.g. kill_thread by the session replay
+    from src.utils.window import get_window_spec_id
+
     try:
         hwnd = get_window_spec_id(window_spec)
         kernel32 = ctypes.WinDLL("kernel32")
@@ -0,0 +1,102 @@
+import cv2
+import numpy as np
+import pytest
+
+import src.cam
+from src.cam import Cam
+from src.capture import BackgroundCapture, ReplayBackend
+from src.config.ui import ResManager
+
+
+@pytest.fixture
+def frames(tmp_path):
+    for idx in range(3):
+        cv2.imwrite(str(tmp_path / f"frame_{idx}.png"), np.full((1080, 1920, 3), idx, dtype=np.uint8))
+    return tmp_path
+
+
+def test_replay_backend(frames, monkeypatch):
+    """Cam grabs recorded frames in order, sets the window to their resolution and keeps returning the last frame"""
+    monkeypatch.setattr(Cam(), "backend", None)
+    # other tests can change the resolution without the window
+    monkeypatch.setattr(Cam(), "window_offset_set", False)
+    Cam().set_backend(ReplayBackend(frames))
+    assert Cam().window_roi["width"] == 1920
+    assert ResManager().resolution == (1920, 1080)
+    grabbed = [Cam().grab(force_new=True)[0, 0, 0] for _ in range(4)]
+    assert grabbed == [0, 1, 2, 2]
+    assert Cam().grab()[0, 0, 0] == 2
+
+
+def test_replay_backend_loop(frames):
+    """Looping replay starts over after the last frame"""
+    backend = ReplayBackend(frames, loop=True)
+    assert [backend.grab({})[0, 0, 0] for _ in range(4)] == [0, 1, 2, 0]
+    assert backend.remaining == 2
+
+
+def test_grab_roi(tmp_path, monkeypatch):
+    """Grabs of a region are clipped to the window and equal the region of the full frame"""
+    cv2.imwrite(str(tmp_path / "frame.png"), np.random.default_rng(0).integers(0, 255, (1080, 1920, 3), dtype=np.uint8))
+    monkeypatch.setattr(Cam(), "backend", None)
+    Cam().set_backend(ReplayBackend(tmp_path))
+    full = Cam().grab(force_new=True)
+    assert Cam().grab(roi=[100, 200, 50, 60]).shape == (60, 50, 3)
+    assert np.array_equal(Cam().grab(roi=[100, 200, 50, 60]), full[200:260, 100:150])
+    region = Cam().grab(force_new=True, roi=[1900, -10, 50, 60])
+    assert region.shape == (50, 20, 3)
+    assert list(Cam().clip_to_window([1900, -10, 50, 60])) == [1900, 0, 20, 50]
+
+
+def test_background_capture(frames):
+    """Background capture serves copies of the latest frame with increasing ids and wakes up readers on new frames"""
+    capture = BackgroundCapture(ReplayBackend(frames, loop=True), {}, fps=100)
+    capture.start()
+    try:
+        first = capture.wait_for_newer(-1, timeout=5)
+        newer = capture.wait_for_newer(first.frame_id, timeout=5)
+        assert newer.frame_id > first.frame_id
+        assert newer.timestamp > first.timestamp
+        newer.img[:] = 255
+        assert capture.latest().img.max() < 255
+        assert capture.latest(np.array([10, 20, 30, 40])).img.shape == (40, 30, 3)
+    finally:
+        capture.stop()
+    assert not capture.is_running
+    assert capture.wait_for_newer(capture.latest().frame_id, timeout=0.05) is None
+
+
+def test_cam_background_capture(frames, monkeypatch):
+    """Cam grabs from the background capture while it runs and a forced grab waits for the next frame"""
+    monkeypatch.setattr(Cam(), "backend", None)
+    Cam().set_backend(ReplayBackend(frames, loop=True))
+    Cam().start_capture(fps=100)
+    try:
+        img, frame_id = Cam().grab_frame()
+        assert Cam().grab_frame(force_new=True)[1] > frame_id
+        assert Cam().grab(roi=[100, 200, 50, 60]).shape == (60, 50, 3)
+    finally:
+        Cam().stop_capture()
+    assert Cam().background_capture is None
+
+
+def test_cam_background_capture_stalled(frames, monkeypatch):
+    """Cam grabs directly if the background capture does not deliver a frame in time"""
+    monkeypatch.setattr(Cam(), "backend", None)
+    Cam().set_backend(ReplayBackend(frames))
+    monkeypatch.setattr(src.cam, "BACKGROUND_CAPTURE_TIMEOUT", 0.05)
+    # never started, so it never captures a frame
+    monkeypatch.setattr(Cam(), "background_capture", BackgroundCapture(Cam().backend, Cam().window_roi, fps=100))
+    img, frame_id = Cam().grab_frame(force_new=True)
+    assert img.shape == (1080, 1920, 3)
+    assert frame_id > 0
+
+
+def test_grab_into(frames):
+    """Backends write frames into the passed array as long as it has the shape of the frame"""
+    backend = ReplayBackend(frames)
+    out = backend.grab_into({}, None)
+    assert out.shape == (1080, 1920, 3)
+    assert backend.grab_into({}, out) is out
+    assert out[0, 0, 0] == 1
+    assert backend.grab_into({}, np.empty((10, 10, 3), dtype=np.uint8)).shape == (1080, 1920, 3)
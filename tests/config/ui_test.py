@@ -2,7 +2,10 @@ import numpy as np
 import pytest
 from natsort import natsorted
 
-from src.config.data import COLORS
+import src.config.data
+import src.config.template_cache
+from src.config.data import COLORS, TEMPLATE_VARIANTS, load_templates
+from src.config.template_cache import load_cached_templates, save_cached_templates, templates_hash
 from src.config.ui import ResManager, _ResTransformer
 
 _PIXELS = [np.array([0, 0]), np.array([3840, 0]), np.array([0, 2160]), np.array([3840, 2160])]
@@ -42,3 +45,51 @@ def test_colors():
 
 def test_templates():
     assert len(ResManager().templates) == 51
+
+
+def test_template_cache(tmp_path, mocker):
+    """Templates loaded from the cache must equal freshly transformed ones"""
+    mocker.patch("src.config.template_cache._cache_root", return_value=tmp_path)
+    transformed = _ResTransformer("2560x1440")._transform_templates(load_templates())
+    save_cached_templates("2560x1440", transformed)
+    cached = load_cached_templates("2560x1440")
+    assert cached.keys() == transformed.keys()
+    for name, template in transformed.items():
+        for variant in TEMPLATE_VARIANTS:
+            expected = getattr(template, variant)
+            if expected is None:
+                assert getattr(cached[name], variant) is None
+            else:
+                np.testing.assert_array_equal(getattr(cached[name], variant), expected)
+
+
+def test_template_cache_version(monkeypatch):
+    """Changing the preparation of templates invalidates the cache"""
+    current = templates_hash()
+    monkeypatch.setattr(src.config.template_cache, "CACHE_VERSION", src.config.template_cache.CACHE_VERSION + 1)
+    templates_hash.cache_clear()
+    try:
+        assert templates_hash() != current
+    finally:
+        monkeypatch.undo()
+        templates_hash.cache_clear()
+    assert templates_hash() == current
+
+
+def test_templates_are_lazy():
+    """Variants of a template are only created once they are accessed"""
+    template = _ResTransformer("1920x1080")._transform_templates(load_templates())["junk_inv"]
+    assert template.build("img_gray") is not None
+    assert "img_gray" not in repr(template)
+    np.testing.assert_array_equal(template.img_gray, template.build("img_gray"))
+    assert "img_gray" in repr(template)
+    assert "img_bgr" not in repr(template)
+
+
+def test_template_is_decoded_once(mocker):
+    """All variants of a template asset are derived from a single decode of its image"""
+    imread = mocker.spy(src.config.data.cv2, "imread")
+    template = _ResTransformer("1920x1080")._transform_templates(load_templates.__wrapped__())["junk_inv"]
+    for variant in TEMPLATE_VARIANTS:
+        template.build(variant)
+    assert imread.call_count == 1
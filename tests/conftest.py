@@ -1,8 +1,19 @@
 import pytest
 from pytest_mock import MockerFixture
 
+from src.cam import Cam
 from src.config.loader import IniConfigLoader
 from src.config.models import BrowserType
+from src.config.ui import ResManager
+
+
+@pytest.fixture(scope="session", autouse=True)
+def template_cache_dir(tmp_path_factory):
+    """Scaled templates are cached in a temporary folder instead of the user dir"""
+    cache_root = tmp_path_factory.mktemp("templates")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("src.config.template_cache._cache_root", lambda: cache_root)
+        yield cache_root
 
 
 @pytest.fixture
@@ -12,3 +23,18 @@ def mock_ini_loader(mocker: MockerFixture):
     general_mock.browser = BrowserType.edge
     general_mock.full_dump = False
     return IniConfigLoader()
+
+
+@pytest.fixture
+def restore_resolution(monkeypatch):
+    """Resolution, ui positions and templates of ResManager are restored after the test"""
+    for attr in ("_current_resolution", "_offsets", "_pos", "_roi", "_templates"):
+        monkeypatch.setattr(ResManager(), attr, getattr(ResManager(), attr))
+
+
+@pytest.fixture
+def restore_window(monkeypatch, restore_resolution):
+    """Window of Cam is restored after the test, along with the resolution of ResManager"""
+    monkeypatch.setattr(Cam(), "window_roi", dict(Cam().window_roi))
+    for attr in ("window_offset_set", "monitor_x_range", "monitor_y_range", "res_key"):
+        monkeypatch.setattr(Cam(), attr, getattr(Cam(), attr))
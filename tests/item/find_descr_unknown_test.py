@@ -1,12 +1,14 @@
 import time
 
 import cv2
+import numpy as np
 import pytest
 
 from src.cam import Cam
+from src.capture import ReplayBackend
 from src.config import BASE_DIR
 from src.item.data.rarity import ItemRarity
-from src.item.find_descr import find_descr
+from src.item.find_descr import descr_roi, find_descr
 
 BASE_PATH = BASE_DIR / "tests/assets/item/unknown"
 
@@ -34,3 +36,30 @@ def test_find_descr(img_res, input_img, anchor, expected_success, expected_top_l
     assert abs(top_left_corner[0] - expected_top_left[0]) <= tolerance
     assert abs(top_left_corner[1] - expected_top_left[1]) <= tolerance
     assert item_rarity == expected_rarity
+
+
+@pytest.mark.parametrize(
+    ("img_res", "input_img", "anchor"),
+    [
+        ((1920, 1080), f"{BASE_PATH}/find_descr_rare_1080p.png", (1450, 761)),
+        ((1920, 1080), f"{BASE_PATH}/find_descr_common_1080p.png", (75, 320)),
+        ((2560, 1440), f"{BASE_PATH}/find_descr_legendary_1440p.png", (1723, 1012)),
+    ],
+)
+def test_find_descr_grab_roi(img_res, input_img, anchor, tmp_path, monkeypatch):
+    """find_descr only grabs the region of the description if no image is passed, results must not change"""
+    img = cv2.imread(input_img)
+    cv2.imwrite(str(tmp_path / "frame.png"), img)
+    monkeypatch.setattr(Cam(), "backend", None)
+    Cam().set_backend(ReplayBackend(tmp_path, loop=True))
+    success, item_rarity, cropped_img, roi = find_descr(img, anchor)
+    success_roi, item_rarity_roi, cropped_img_roi, roi_roi = find_descr(None, anchor)
+    assert success == success_roi
+    assert item_rarity == item_rarity_roi
+    assert list(roi) == list(roi_roi)
+    assert np.array_equal(cropped_img, cropped_img_roi)
+    search_roi = descr_roi(anchor)
+    success_crop, _, cropped_img_crop, roi_crop = find_descr(Cam().grab(roi=search_roi), anchor, int(search_roi[0]))
+    assert success == success_crop
+    assert list(roi) == list(roi_crop)
+    assert np.array_equal(cropped_img, cropped_img_crop)
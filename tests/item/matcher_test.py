@@ -0,0 +1,30 @@
+from src.dataloader import Dataloader
+from src.item.descr.matcher import FuzzyMatcher
+
+
+def test_fuzzy_matcher():
+    """The closest candidate is found by its text, the first key wins for shared texts and distant texts are not matched"""
+    matcher = FuzzyMatcher({"life": "maximum life", "life_2": "maximum life", "armor": "armor"}, score_cutoff=3)
+    assert matcher.match("maximun life") == ("life", 1)
+    assert matcher.match("armor") == ("armor", 0)
+    assert matcher.match("critical strike damage") == (None, None)
+
+
+def test_dataloader_matchers():
+    """Dataloader matches the texts of affixes and the keys of sigil affixes"""
+    dataloader = Dataloader()
+    assert len(dataloader.affix_matcher) == len(dataloader.affix_dict)
+    assert dataloader.affix_matcher.match("maximum life") == ("maximum_life", 0)
+    sigil_key = next(iter(dataloader.affix_sigil_dict))
+    assert dataloader.affix_sigil_key_matcher.match(sigil_key) == (sigil_key, 0)
+
+
+def test_match_many():
+    """Matching in one batch gives the same keys and distances as matching each text on its own"""
+    matcher = FuzzyMatcher({"life": "maximum life", "life_2": "maximum life", "armor": "armor", "thorns": "thorns"}, score_cutoff=3)
+    targets = ["maximun life", "armour", "thorn", "critical strike damage", ""]
+    assert matcher.match_many(targets) == [matcher.match(target) for target in targets]
+    assert matcher.match_many([]) == []
+    affix_matcher = Dataloader().affix_matcher
+    targets = ["maximum life", "+12% critical strike chance", "movment sped", "lucky hit chance to restore primary resource"]
+    assert affix_matcher.match_many(targets, workers=1) == [affix_matcher.match(target) for target in targets]
@@ -320,8 +320,7 @@ items = [
                 Affix(name="maximum_life", value=2882, type=AffixType.greater),
                 Affix(name="critical_strike_damage", value=108.1),
                 Affix(name="critical_strike_damage", value=210, type=AffixType.tempered),
-                # image quality is so bad it reads 70.19 instead of 70.1
-                Affix(name="chance_for_a_second_lightning_spear_when_cast", value=70.19, type=AffixType.tempered),
+                Affix(name="chance_for_a_second_lightning_spear_when_cast", value=70.1, type=AffixType.tempered),
             ],
             inherent=[Affix(name="damage_over_time", value=40, type=AffixType.inherent)],
             item_type=ItemType.Staff,
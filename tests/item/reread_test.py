@@ -0,0 +1,45 @@
+import threading
+
+from src.item.descr.reread import ReadAttempt, read_regions
+from src.utils.ocr.models import OcrResult
+
+
+def test_read_regions():
+    """Only regions that failed or were matched uncertainly are read again and the closer match is kept"""
+    first = {
+        "fine": ReadAttempt(text="fine", key="fine", distance=0),
+        "failed": ReadAttempt(text="fa1led"),
+        "uncertain": ReadAttempt(text="uncertian", key="uncertain", distance=2, ocr_result=OcrResult(word_confidences=[95, 40])),
+        "confident": ReadAttempt(text="confldent", key="confident", distance=1, ocr_result=OcrResult(word_confidences=[95, 90])),
+        "worse": ReadAttempt(text="w0rse", key="worse", distance=1, ocr_result=OcrResult(word_confidences=[30])),
+    }
+    second = {
+        "failed": ReadAttempt(text="failed", key="failed", distance=0, do_pre_proc=False),
+        "uncertain": ReadAttempt(text="uncertain", key="uncertain", distance=0, do_pre_proc=False),
+        "worse": ReadAttempt(text="w0r5e", key="worse", distance=2, do_pre_proc=False),
+    }
+    reads = []
+
+    def _read(region: str, do_pre_proc: bool) -> ReadAttempt:
+        reads.append((region, do_pre_proc))
+        return first[region] if do_pre_proc else second[region]
+
+    matched = []
+    attempts = read_regions(list(first), _read, matched.append, True)
+    assert [len(batch) for batch in matched] == [5, 3]
+    assert sorted(region for region, do_pre_proc in reads if not do_pre_proc) == ["failed", "uncertain", "worse"]
+    assert [attempt.text for attempt in attempts] == ["fine", "failed", "uncertain", "confldent", "w0rse"]
+
+
+def test_read_regions_own_executor():
+    """Regions are not read on TP, whose workers may all be waiting for the reads"""
+    threads = set()
+
+    def _read(region: str, do_pre_proc: bool) -> ReadAttempt:
+        threads.add(threading.current_thread().name)
+        return ReadAttempt(text=region) if do_pre_proc else ReadAttempt(text=region, key=region, distance=0, do_pre_proc=False)
+
+    attempts = read_regions(["a", "b"], _read, lambda attempts: None, True)
+    assert [attempt.do_pre_proc for attempt in attempts] == [False, False]
+    assert threads
+    assert all(name.startswith("ReadRegions") for name in threads)
@@ -0,0 +1,124 @@
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+import src.session
+from src.cam import Cam
+from src.capture import ReplayBackend
+from src.config import BASE_DIR
+from src.config.ui import ResManager
+from src.item.data.rarity import ItemRarity
+from src.item.find_descr import find_descr
+from src.session import (
+    SessionReader,
+    SessionRecorder,
+    SessionReplayBackend,
+    record_event,
+    replay_session,
+    start_recording,
+    stop_recording,
+)
+
+BASE_PATH = BASE_DIR / "tests/assets/item/unknown"
+
+
+@pytest.mark.skipif(sys.platform != "win32", reason="recording reads the mouse, which needs Windows")
+def test_record_and_replay(tmp_path, monkeypatch, restore_window):
+    """A recorded session serves the same frames and mouse positions on replay, regions are cropped from full frames"""
+    from src.utils.custom_mouse import mouse
+
+    frames = tmp_path / "frames"
+    frames.mkdir()
+    cv2.imwrite(str(frames / "frame.png"), cv2.imread(str(BASE_PATH / "find_descr_rare_1080p.png")))
+    monkeypatch.setattr(Cam(), "backend", None)
+    monkeypatch.setattr(mouse, "get_position", staticmethod(lambda: (1450, 761)))
+    Cam().set_backend(ReplayBackend(frames, loop=True))
+    # the window can be unchanged by other tests while they changed the resolution
+    ResManager().set_resolution("1920x1080")
+
+    start_recording(tmp_path / "session")
+    pos = mouse.get_position()
+    found, rarity, cropped_descr, item_roi = find_descr(None, pos)
+    record_event("decision", action="junk")
+    full = Cam().grab(force_new=True)
+    path = stop_recording(archive=True)
+
+    assert path.suffix == ".zip"
+    assert mouse.get_position() == (1450, 761)
+    reader = SessionReader(path)
+    assert [event["type"] for event in reader.events] == ["window", "mouse", "frame", "decision", "frame"]
+    assert reader.of_type("decision")[0]["action"] == "junk"
+
+    backend = SessionReplayBackend(reader)
+    Cam().set_backend(backend)
+    assert backend.resolution == (1920, 1080)
+    assert backend.get_position() == (1450, 761)
+    replayed = find_descr(None, (1450, 761))
+    assert replayed[:2] == (found, rarity)
+    assert np.array_equal(replayed[2], cropped_descr)
+    assert list(replayed[3]) == list(item_roi)
+    assert np.array_equal(Cam().grab(force_new=True), full)
+    with pytest.raises(EOFError):
+        Cam().grab(force_new=True)
+    assert backend.finished.is_set()
+
+    backend = SessionReplayBackend(reader)
+    assert np.array_equal(backend.grab(Cam().window_roi, np.array([10, 20, 30, 40])), full[20:60, 10:40])
+    assert backend.num_frames == 1
+
+
+def test_record_unchanged_frames(tmp_path):
+    """Unchanged grabs of a region refer to the frame that was stored for it, grabs of other regions in between do not matter"""
+    img = cv2.imread(str(BASE_PATH / "find_descr_rare_1080p.png"))
+    roi = np.array([10, 20, 30, 40])
+    changed = img.copy()
+    changed[0, 0] += 1
+    recorder = SessionRecorder(tmp_path / "session")
+    for frame, frame_roi in [(img, None), (img[20:60, 10:40], roi), (img, None), (changed, None), (img[20:60, 10:40], roi)]:
+        recorder.record_frame(frame, frame_roi)
+    path = recorder.close()
+
+    reader = SessionReader(path)
+    files = [event["file"] for event in reader.of_type("frame")]
+    assert files[2] == files[0]
+    assert files[4] == files[1]
+    assert len(set(files)) == 3
+    assert len(list((path / "frames").glob("*.png"))) == 3
+    backend = SessionReplayBackend(reader)
+    grabs = [backend.grab(Cam().window_roi, frame_roi) for frame_roi in [None, roi, None, None, roi]]
+    assert np.array_equal(grabs[2], img)
+    assert np.array_equal(grabs[3], changed)
+    assert np.array_equal(grabs[4], img[20:60, 10:40])
+
+
+def test_replay_session(tmp_path, monkeypatch, restore_window):
+    """The loot filter replays a recorded session without Windows and reads the hovered item from the recorded frames"""
+    img = cv2.imread(str(BASE_PATH / "find_descr_legendary_1440p.png"))
+    recorder = SessionRecorder(tmp_path / "session")
+    recorder.record("window", roi={"top": 0, "left": 0, "width": img.shape[1], "height": img.shape[0]})
+    recorder.record("hotkey", action="run_filter")
+    # the chest and the inventory are checked, then the description of the first item is grabbed twice
+    for _ in range(4):
+        recorder.record_frame(img)
+    path = recorder.close(archive=True)
+
+    src.session._stub_windows_modules()
+    from src.scripts import loot_filter
+
+    items = []
+    read_descr = loot_filter.read_descr
+
+    def _read_descr(*args, **kwargs):
+        items.append(read_descr(*args, **kwargs))
+        return items[-1]
+
+    monkeypatch.setattr(loot_filter, "read_descr", _read_descr)
+    monkeypatch.setattr(Cam(), "backend", None)
+    report = replay_session(path, timeout=30)
+    assert report.num_frames == 4
+    assert [item.rarity for item in items] == [ItemRarity.Legendary]
+    assert report.decisions_match
+    assert Cam().backend is not None
+    assert not isinstance(Cam().backend, SessionReplayBackend)
@@ -1,6 +1,16 @@
+import concurrent.futures
+import json
+
 import cv2
+import pytest
 
 import src.template_finder
+from src.cam import Cam
+from src.config import BASE_DIR
+from src.config.data import Template
+from src.config.ui import ResManager, _ResTransformer
+from src.template_finder import TemplateMatch, filter_close_matches
+from src.utils.image_operations import alpha_to_mask
 from src.utils.misc import is_in_roi
 
 
@@ -20,6 +30,45 @@ def test_search():
     assert threshold <= match.score < 1
 
 
+def test_search_first_skips_remaining_templates():
+    """
+    Test early exit of search "first"
+    - cross matches above threshold, so slash does not need to be evaluated
+    - test passes if the cross match is returned, and sequential search only evaluated one template
+    """
+    image = cv2.imread("tests/assets/template_finder/stash_slots.png")
+    slash = cv2.imread("tests/assets/template_finder/stash_slot_slash.png")
+    cross = cv2.imread("tests/assets/template_finder/stash_slot_cross.png")
+    cross_result = src.template_finder.search(cross, image, 0.6)
+    result = src.template_finder.search([cross, slash], image, 0.6, do_multi_process=False)
+    assert result.matches == cross_result.matches
+    assert result.evaluated_templates == 1
+    result = src.template_finder.search([cross, slash], image, 0.6, mode="all")
+    assert result.evaluated_templates == 2
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_search_first_concurrent(monkeypatch, max_workers):
+    """
+    Test early exit of concurrent search "first"
+    - cross is first in the list and matches above threshold, the perfectly matching slashes after it are evaluated concurrently
+    - test passes if the cross match wins by list order and, with a single worker, the templates still queued are cancelled
+    """
+    image = cv2.imread("tests/assets/template_finder/stash_slots.png")
+    slash = cv2.imread("tests/assets/template_finder/stash_slot_slash.png")
+    cross = cv2.imread("tests/assets/template_finder/stash_slot_cross.png")
+    templates = [cross, slash, slash, slash, slash]
+    cross_result = src.template_finder.search(cross, image, 0.6)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+        monkeypatch.setattr(src.template_finder, "TP", pool)
+        result = src.template_finder.search(templates, image, 0.6, do_multi_process=True)
+    assert result.matches == cross_result.matches
+    assert result.matches[0].score < 1
+    if max_workers == 1:
+        # the worker may already have started the second template when the first one completes
+        assert result.evaluated_templates < len(templates)
+
+
 def test_search_best_match():
     """
     Test search "best_match" behavior
@@ -63,6 +112,161 @@ def test_search_all_multiple_templates():
     assert len(matches) == 4
 
 
+def test_search_pyramid():
+    """
+    Test coarse-to-fine search
+    - searches for empty slots and slash with and without pyramid levels
+    - test passes if both searches result in the same matches and scores
+    """
+    image = cv2.imread("tests/assets/template_finder/stash_slots.png")
+    empty = cv2.imread("tests/assets/template_finder/stash_slot_empty.png")
+    slash = cv2.imread("tests/assets/template_finder/stash_slot_slash.png")
+    result = src.template_finder.search([empty, slash], image, threshold=0.98, mode="all")
+    result_pyramid = src.template_finder.search([empty, slash], image, threshold=0.98, mode="all", pyramid_levels=1)
+    assert [(m.center, m.score) for m in result.matches] == [(m.center, m.score) for m in result_pyramid.matches]
+
+
+def test_search_image_variants_are_shared():
+    """
+    Test the preprocessing cache of a search
+    - requests the grayscale variant of a roi twice
+    - test passes if the variant is only computed once and has the roi size
+    """
+    image = cv2.imread("tests/assets/template_finder/stash_slots.png")
+    search_image = src.template_finder._SearchImage(image, roi=[0, 0, 40, 30])
+    gray = search_image.get(use_grayscale=True)
+    assert gray is search_image.get(use_grayscale=True)
+    assert gray.shape == (30, 40)
+
+
+def test_filter_close_matches():
+    """
+    Test deduplication of matches of different templates on the same object
+    - two matches are 5px apart, a third one is far away
+    - test passes if the weaker of the close matches is removed and the result is sorted by score
+    """
+    matches = [
+        TemplateMatch(center=(10, 10), score=0.8),
+        TemplateMatch(center=(13, 14), score=0.9),
+        TemplateMatch(center=(10, 60), score=0.85),
+    ]
+    assert [m.center for m in filter_close_matches(matches, 10)] == [(13, 14), (10, 60)]
+
+
+def test_search_location_cache(monkeypatch):
+    """
+    Test searching around the last known location
+    - first search finds the slash in the full image and remembers its location
+    - second search finds it again around that location
+    - test passes if both searches return the same match and the second one is a cache hit
+    """
+    image = cv2.imread("tests/assets/template_finder/stash_slots.png")
+    slash = cv2.imread("tests/assets/template_finder/stash_slot_slash.png")
+    monkeypatch.setitem(ResManager().templates, "test_slash", Template(name="test_slash", img_bgr=slash, alpha_mask=None))
+    src.template_finder.LOCATION_CACHE.clear()
+    first = src.template_finder.search("test_slash", image, 0.9, use_location_cache=True)
+    second = src.template_finder.search("test_slash", image, 0.9, use_location_cache=True)
+    assert first.success
+    assert first.matches == second.matches
+    assert first.matches[0].region == second.matches[0].region
+    assert src.template_finder.LOCATION_CACHE.hits == 1
+    assert src.template_finder.LOCATION_CACHE.hit_rate == 0.5
+
+
+def test_search_frame_cache(monkeypatch):
+    """
+    Test caching of search results per frame
+    - repeated search on the same frame is answered from the cache without evaluating templates
+    - search on a new frame evaluates the templates again
+    """
+    image = cv2.imread("tests/assets/template_finder/stash_slots.png")
+    slash = cv2.imread("tests/assets/template_finder/stash_slot_slash.png")
+    monkeypatch.setitem(ResManager().templates, "test_slash", Template(name="test_slash", img_bgr=slash, alpha_mask=None))
+    frame = {"id": 1}
+    monkeypatch.setattr(Cam, "grab_frame", lambda self, force_new=False: (image, frame["id"]))
+    first = src.template_finder.search("test_slash", threshold=0.9)
+    second = src.template_finder.search("test_slash", threshold=0.9)
+    assert first.success
+    assert first.matches == second.matches
+    assert first.evaluated_templates == 1
+    assert second.evaluated_templates == 0
+    assert src.template_finder.search("test_slash", threshold=0.8).evaluated_templates == 1
+    frame["id"] = 2
+    assert src.template_finder.search("test_slash", threshold=0.9).evaluated_templates == 1
+    # region grabs get their own frame ids, results of the previous frame are still cached
+    frame["id"] = 1
+    assert src.template_finder.search("test_slash", threshold=0.9).evaluated_templates == 0
+
+
+def test_frame_result_cache():
+    """
+    Test eviction of cached results per frame
+    - results of interleaved frames are kept up to max_frames
+    - test passes if the oldest frame is dropped first and an older frame does not evict newer results
+    """
+    cache = src.template_finder.FrameResultCache(max_frames=2)
+    result = src.template_finder.SearchResult(success=True)
+    cache.put(2, ("a",), result)
+    cache.put(3, ("b",), result)
+    cache.put(1, ("c",), result)
+    assert cache.get(1, ("c",)) is None
+    assert cache.get(2, ("a",)).success
+    cache.put(4, ("d",), result)
+    assert cache.get(2, ("a",)) is None
+    assert cache.get(3, ("b",)).success
+    assert cache.get(4, ("d",)).success
+
+
+def test_search_cropped_template(monkeypatch, restore_resolution):
+    """
+    Test matching of templates that are cropped to their opaque area
+    - searches junk markers with the cropped template and with the whole masked template asset
+    - test passes if both return the same regions and scores
+    """
+    ResManager().set_resolution("1920x1080")
+    image = cv2.imread("tests/assets/ui/char_inventory_fav_junk_1080p_2.png")
+    template_img = cv2.imread(str(next((BASE_DIR / "assets/templates").rglob("junk_inv.png"))), cv2.IMREAD_UNCHANGED)
+    transformer = _ResTransformer("1920x1080")
+    full = Template(
+        name="junk_inv_full",
+        img_bgr=transformer._resize_image(cv2.cvtColor(template_img, cv2.COLOR_BGRA2BGR)),
+        img_gray=transformer._resize_image(cv2.cvtColor(template_img, cv2.COLOR_BGRA2GRAY)),
+        alpha_mask=transformer._resize_image(alpha_to_mask(template_img)),
+    )
+    monkeypatch.setitem(ResManager().templates, "junk_inv_full", full)
+    roi = ResManager().roi.slots_3x11
+    cropped_result = src.template_finder.search("junk_inv", image, 0.65, roi=roi, use_grayscale=True, mode="all")
+    full_result = src.template_finder.search("junk_inv_full", image, 0.65, roi=roi, use_grayscale=True, mode="all")
+    assert ResManager().templates["junk_inv"].img_gray.shape < full.img_gray.shape
+    assert len(cropped_result.matches) == len(full_result.matches) > 0
+    for cropped, full in zip(cropped_result.matches, full_result.matches, strict=True):
+        assert cropped.region == full.region
+        assert cropped.score == pytest.approx(full.score, abs=1e-3)
+
+
+def test_template_stats(monkeypatch, tmp_path):
+    """
+    Test statistics per template
+    - searches a template that matches and one that does not
+    - test passes if calls, hits and roi area are recorded per template and written to json
+    """
+    image = cv2.imread("tests/assets/template_finder/stash_slots.png")
+    slash = cv2.imread("tests/assets/template_finder/stash_slot_slash.png")
+    monkeypatch.setitem(ResManager().templates, "test_slash", Template(name="test_slash", img_bgr=slash, alpha_mask=None))
+    monkeypatch.setitem(ResManager().templates, "test_flipped", Template(name="test_flipped", img_bgr=slash[::-1].copy(), alpha_mask=None))
+    monkeypatch.setattr(src.template_finder, "TEMPLATE_STATS", src.template_finder.TemplateStats())
+    for _ in range(3):
+        src.template_finder.search(["test_slash", "test_flipped"], image, 0.9, mode="all")
+    stats = src.template_finder.TEMPLATE_STATS.summary()
+    assert stats["test_slash"]["calls"] == stats["test_flipped"]["calls"] == 3
+    assert stats["test_slash"]["hit_rate"] == 1
+    assert stats["test_flipped"]["hit_rate"] == 0
+    assert stats["test_slash"]["mean_roi_area"] == image.shape[0] * image.shape[1]
+    assert stats["test_slash"]["p50_ms"] <= stats["test_slash"]["p99_ms"]
+    src.template_finder.TEMPLATE_STATS.dump(tmp_path / "stats.json")
+    assert json.loads((tmp_path / "stats.json").read_text()) == stats
+
+
 if __name__ == "__main__":
     image = cv2.imread("tests/assets/template_finder/stash_slots.png")
     empty = cv2.imread("tests/assets/template_finder/stash_slot_empty.png")
@@ -2,6 +2,7 @@ import cv2
 import pytest
 
 from src.cam import Cam
+from src.capture import ReplayBackend
 from src.config import BASE_DIR
 from src.ui.char_inventory import CharInventory
 
@@ -58,3 +59,14 @@ def test_get_item_slots(img_res, input_img, occupied, junk, fav):
     assert occupied == len(occupied_slots)
     assert fav == num_fav
     assert junk == num_junk
+
+
+def test_grab_roi(tmp_path, monkeypatch):
+    """is_open and get_item_slots only grab their regions if no image is passed, results must not change"""
+    img = cv2.imread(f"{BASE_PATH}/char_inventory_fav_junk_1080p_2.png")
+    cv2.imwrite(str(tmp_path / "frame.png"), img)
+    monkeypatch.setattr(Cam(), "backend", None)
+    Cam().set_backend(ReplayBackend(tmp_path, loop=True))
+    inv = CharInventory()
+    assert inv.is_open()
+    assert inv.get_item_slots() == inv.get_item_slots(img)
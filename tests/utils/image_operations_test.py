@@ -1,7 +1,17 @@
 import numpy as np
 import pytest
 
-from src.utils.image_operations import ThresholdTypes, alpha_to_mask, color_filter, create_mask, crop, mask_by_roi, overlay_image, threshold
+from src.utils.image_operations import (
+    FrameChangeDetector,
+    ThresholdTypes,
+    alpha_to_mask,
+    color_filter,
+    create_mask,
+    crop,
+    mask_by_roi,
+    overlay_image,
+    threshold,
+)
 
 
 def test_binary_threshold():
@@ -151,3 +161,21 @@ def test_overlay_image():
     # Check if the rest of the area is blank
     assert np.all(combined_image[15:] == 0)
     assert np.all(combined_image[:, 15:] == 0)
+
+
+def test_frame_change_detector():
+    """Only frames that differ noticeably from the last processed frame or have a different key are processed"""
+    img = np.random.default_rng(0).integers(0, 255, (200, 300, 3), dtype=np.uint8)
+    detector = FrameChangeDetector()
+    assert detector.has_changed(img, key=1)
+    assert not detector.has_changed(img.copy(), key=1)
+    small_change = img.copy()
+    small_change[:5, :5] = 255 - small_change[:5, :5]
+    assert not detector.has_changed(small_change, key=1)
+    big_change = img.copy()
+    big_change[50:100, 50:250] = 255 - big_change[50:100, 50:250]
+    assert detector.has_changed(big_change, key=1)
+    assert detector.has_changed(big_change, key=2)
+    detector.reset()
+    assert detector.has_changed(big_change, key=2)
+    assert (detector.processed, detector.skipped) == (4, 2)
@@ -1,6 +1,27 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
 import cv2
+import numpy as np
+import pytest
 
-from src.utils.ocr.read import image_to_text
+import src.utils.ocr.read
+from src.config import BASE_DIR
+from src.config.data import COLORS, POSITIONS
+from src.config.models import HSVRangeModel
+from src.config.ui import ResManager
+from src.utils.ocr.read import (
+    OCR_CACHE,
+    USER_WORDS_FILE,
+    APIPool,
+    OcrCache,
+    OcrSession,
+    _pre_proc_img,
+    _unscale_boxes,
+    image_to_text,
+    ocr_scale,
+)
 
 
 def test_tesserocr():
@@ -10,3 +31,133 @@ def test_tesserocr():
     """
     img = cv2.imread("tests/assets/ocr/header_champions_demise.png")
     assert image_to_text(img).text == "Champion's Demise"
+
+
+def test_api_pool():
+    """Borrowing blocks while all APIs are in use and APIs are returned to the pool"""
+    pool = APIPool()
+
+    def _borrow():
+        with pool.api() as api:
+            return api
+
+    with ExitStack() as stack:
+        apis = [stack.enter_context(pool.api()) for _ in range(pool.size)]
+        assert len({id(api) for api in apis}) == pool.size
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(_borrow)
+            time.sleep(0.2)
+            assert not future.done()
+            stack.close()
+            assert future.result(timeout=5) in apis
+    stats = pool.stats()
+    assert stats["created"] == pool.size
+    assert stats["peak_in_use"] == pool.size
+    assert stats["in_use"] == 0
+    assert stats["max_wait_ms"] >= 200
+
+
+def test_empty_image():
+    """Empty images return empty results"""
+    assert image_to_text(np.empty((0, 0, 3), dtype=np.uint8)).text == ""
+    res, line_boxes = image_to_text(np.empty((0, 0, 3), dtype=np.uint8), line_boxes=True)
+    assert res.text == ""
+    assert line_boxes == []
+
+
+def test_ocr_cache(monkeypatch):
+    """Identical crops with the same flags are read once, results are copies and the oldest results are evicted"""
+    cache = OcrCache(max_size=2)
+    monkeypatch.setattr("src.utils.ocr.read.OCR_CACHE", cache)
+    img = cv2.imread("tests/assets/ocr/header_champions_demise.png")
+    res = image_to_text(img)
+    res.text = "changed"
+    assert image_to_text(img.copy()).text == "Champion's Demise"
+    assert (cache.hits, cache.misses) == (1, 1)
+    res, line_boxes = image_to_text(img, line_boxes=True)
+    assert res.text == "Champion's Demise"
+    assert len(line_boxes) == 1
+    assert image_to_text(img, line_boxes=True)[1] == line_boxes
+    image_to_text(img, do_pre_proc=False)
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 3, 1)
+    assert cache.hit_rate == 0.4
+
+
+def test_ocr_vocabulary():
+    """The vocabulary of the OCR contains the words of the language data and the whitelist the characters of numbers"""
+    api = APIPool()._create_api()
+    try:
+        assert api.GetVariableAsString("user_words_file").endswith(USER_WORDS_FILE)
+        whitelist = api.GetVariableAsString("tessedit_char_whitelist")
+        assert all(char in whitelist for char in " 0123456789+-%[].,'")
+    finally:
+        api.End()
+    words = (BASE_DIR / f"assets/lang/enUS/{USER_WORDS_FILE}").read_text(encoding="utf-8").splitlines()
+    assert {"demise", "Demise", "critical", "strike"} <= set(words)
+
+
+def test_api_pool_creation_fails(monkeypatch):
+    """APIs that can not be created do not use up the pool, borrowing raises instead of waiting for them forever"""
+    # a new pool, the shared one already has APIs
+    pool = type(APIPool())()
+
+    def _create_api():
+        time.sleep(0.1)
+        raise RuntimeError("Failed to init API")
+
+    def _borrow():
+        with pool.api():
+            pass
+
+    monkeypatch.setattr(pool, "_create_api", _create_api)
+    with ThreadPoolExecutor(max_workers=pool.size + 1) as executor:
+        futures = [executor.submit(_borrow) for _ in range(pool.size + 1)]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=5)
+    assert pool.stats()["created"] == 0
+
+
+def test_pre_proc_img(monkeypatch):
+    """Red text is blacked out, also if the red hue range wraps around 0"""
+    img = cv2.imread("tests/assets/ocr/header_champions_demise.png")
+    red_img = img.copy()
+    red_img[5:15, 20:60] = (0, 0, 180)
+    # hue 175, only within a range that wraps around
+    red_img[5:15, 70:110] = cv2.cvtColor(np.array([[[175, 230, 180]]], dtype=np.uint8), cv2.COLOR_HSV2BGR)
+    red = _pre_proc_img(red_img)
+    assert red.shape == img.shape[:2]
+    assert not red[6:14, 21:59].any()
+    assert red[6:14, 71:109].any()
+    monkeypatch.setattr(
+        src.utils.ocr.read,
+        "COLORS",
+        COLORS.model_copy(update={"unusable_red": HSVRangeModel(h_s_v_min=np.array([-10, 210, 110]), h_s_v_max=np.array([10, 255, 210]))}),
+    )
+    red = _pre_proc_img(red_img)
+    assert not red[6:14, 21:59].any()
+    assert not red[6:14, 71:109].any()
+
+
+def test_ocr_session():
+    """Regions are read from one image with boxes relative to the region and APIs that read other images in between are reset"""
+    img = cv2.imread("tests/assets/item/season6/1080p_small_read_descr_1.png")
+    x, y, w, h = 30, 280, 340, 120
+    session = OcrSession(img)
+    OCR_CACHE.clear()
+    res, line_boxes = session.read((x, y, w, h), line_boxes=True)
+    assert "You gain 206 [150 - 360] Armor" in res.text
+    assert all(box["x"] < w and box["y"] < h for _, box, *_ in line_boxes)
+    image_to_text(cv2.imread("tests/assets/ocr/header_champions_demise.png"))
+    OCR_CACHE.clear()
+    assert session.read((x, y, w, h)).text == res.text
+
+
+def test_ocr_scale(monkeypatch):
+    """Only text of high resolutions is shrunk and the boxes of its lines are mapped back to the original image with its border"""
+    monkeypatch.setattr(ResManager(), "_offsets", POSITIONS[1])
+    assert ocr_scale() == 0.8
+    monkeypatch.setattr(ResManager(), "_offsets", POSITIONS[1].model_copy(update={"item_descr_line_height": 25}))
+    assert ocr_scale() == 1.0
+    line_boxes = _unscale_boxes([(None, {"x": 20, "y": 30, "w": 40, "h": 8}, 0, 0)], 0.5, border_size=10)
+    assert line_boxes[0][1] == {"x": 30, "y": 50, "w": 80, "h": 16}